@@ -0,0 +1,158 @@
+"""
+Approximate nearest-neighbour search for unit-length embeddings (CLIP
+image vectors), by inner product — an IVF-PQ index in plain NumPy.
+
+Exact search is one [N, d] @ [d] product per query: fine for a gallery of
+dozens, linear in N, and it needs the full float32 matrix in memory. IVFPQ
+instead:
+
+  * clusters the vectors with k-means into `nlist` inverted lists (the
+    coarse quantizer) and only scans the `nprobe` lists whose centroids
+    score best against the query — nprobe is the recall/latency knob;
+  * stores each vector as its list plus a product-quantized residual:
+    the (vector - centroid) split into `m` sub-vectors, each replaced by
+    the id of the nearest of 256 trained codewords — m bytes a vector
+    instead of 4·d. Scoring a list is a lookup-table sum: q·c for the list
+    plus, per sub-space, q_sub·codeword, tabulated once per query.
+
+Callers typically re-rank the returned shortlist against exact vectors
+(clip_search_model does). Training needs a representative sample; after
+that, add() encodes new vectors against the trained quantizers, so an index
+can grow without retraining, and save()/load() keep both the quantizers and
+the codes.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+PQ_CODEWORDS = 256
+KMEANS_ITERS = 15
+TRAIN_POINTS_PER_CENTROID = 40
+
+
+def kmeans(x: np.ndarray, k: int, iters: int = KMEANS_ITERS, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means (squared L2), seeded from random points; empty clusters are re-seeded."""
+    rng = np.random.default_rng(seed)
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    centroids = x[rng.choice(len(x), size=k, replace=len(x) < k)].copy()
+    for _ in range(iters):
+        assign = nearest(x, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        centroids[filled] = np.add.reduceat(x[order], starts, axis=0) / counts[filled, None]
+        empty = counts == 0
+        centroids[empty] = x[rng.choice(len(x), size=int(empty.sum()))]
+    return centroids
+
+
+def nearest(x: np.ndarray, centroids: np.ndarray, block: int = 16384) -> np.ndarray:
+    """Index of the nearest centroid (squared L2) for each row of x, in blocks to bound memory."""
+    half_norms = 0.5 * (centroids * centroids).sum(axis=1)
+    out = np.empty(len(x), dtype=np.int32)
+    for lo in range(0, len(x), block):
+        scores = x[lo:lo + block] @ centroids.T
+        scores -= half_norms
+        out[lo:lo + block] = np.argmax(scores, axis=1)
+    return out
+
+
+class IVFPQIndex:
+    def __init__(self, nlist: int, m: int = 32):
+        self.nlist = nlist
+        self.m = m
+        self.centroids: Optional[np.ndarray] = None  # [nlist, d]
+        self.codebooks: Optional[np.ndarray] = None  # [m, 256, d / m]
+        self.assign = np.zeros(0, dtype=np.int32)  # [n] list of each vector
+        self.codes = np.zeros((0, m), dtype=np.uint8)  # [n, m]
+        self._order = self._offsets = None
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return len(self.assign)
+
+    def train(self, x: np.ndarray, seed: int = 0):
+        """Fit the coarse quantizer and the residual codebooks on a sample of x."""
+        x = np.asarray(x, dtype=np.float32)
+        if x.shape[1] % self.m:
+            raise ValueError(f"dimension {x.shape[1]} is not divisible by m={self.m}")
+        rng = np.random.default_rng(seed)
+        sample = x[rng.permutation(len(x))[: max(self.nlist, PQ_CODEWORDS) * TRAIN_POINTS_PER_CENTROID]]
+        self.centroids = kmeans(sample, self.nlist, seed=seed)
+        residuals = sample - self.centroids[nearest(sample, self.centroids)]
+        self.codebooks = np.stack([
+            kmeans(sub, PQ_CODEWORDS, seed=seed + i)
+            for i, sub in enumerate(np.split(residuals, self.m, axis=1))
+        ])
+
+    def encode(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(list assignment, PQ codes) for x against the trained quantizers."""
+        x = np.asarray(x, dtype=np.float32)
+        assign = nearest(x, self.centroids)
+        residuals = x - self.centroids[assign]
+        codes = np.stack(
+            [nearest(sub, book) for sub, book in zip(np.split(residuals, self.m, axis=1), self.codebooks)], axis=1
+        ).astype(np.uint8)
+        return assign, codes
+
+    def clear(self):
+        """Drop every vector, keeping the trained quantizers."""
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.codes = np.zeros((0, self.m), dtype=np.uint8)
+        self._order = self._offsets = None
+
+    def add(self, x: np.ndarray = None, assign: np.ndarray = None, codes: np.ndarray = None):
+        """Append vectors (encoding them) or already-encoded (assign, codes); ids continue from len(self)."""
+        if x is not None:
+            assign, codes = self.encode(x)
+        self.assign = np.concatenate([self.assign, assign.astype(np.int32)])
+        self.codes = np.concatenate([self.codes, codes.astype(np.uint8)])
+        self._order = self._offsets = None
+
+    def _lists(self):
+        if self._order is None:
+            self._order = np.argsort(self.assign, kind="stable").astype(np.int32)
+            self._offsets = np.searchsorted(self.assign[self._order], np.arange(self.nlist + 1)).astype(np.int64)
+        return self._order, self._offsets
+
+    def search(self, q: np.ndarray, k: int, nprobe: int = 8) -> tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k (scores, ids) by inner product with q ([d]), best
+        first. nprobe is clamped to [1, nlist]."""
+        q = np.asarray(q, dtype=np.float32).ravel()
+        order, offsets = self._lists()
+        coarse = self.centroids @ q
+        nprobe = max(1, min(int(nprobe), self.nlist))
+        probe = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+
+        ids = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe])
+        if len(ids) == 0:
+            return np.zeros(0, dtype=np.float32), ids
+        lut = np.einsum("mkd,md->mk", self.codebooks, q.reshape(self.m, -1))  # [m, 256]
+        scores = coarse[self.assign[ids]] + lut[np.arange(self.m), self.codes[ids]].sum(axis=1)
+
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return scores[top], ids[top]
+
+    def save(self, path: Path, **extra):
+        np.savez(
+            path, nlist=self.nlist, m=self.m, centroids=self.centroids, codebooks=self.codebooks,
+            assign=self.assign, codes=self.codes, **extra,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> tuple["IVFPQIndex", dict]:
+        """The index saved at path, plus whatever extra arrays were saved with it."""
+        with np.load(path) as data:
+            arrays = {key: data[key] for key in data.files}
+        index = cls(int(arrays.pop("nlist")), int(arrays.pop("m")))
+        index.centroids, index.codebooks = arrays.pop("centroids"), arrays.pop("codebooks")
+        index.assign, index.codes = arrays.pop("assign"), arrays.pop("codes")
+        return index, arrays
@@ -12,14 +12,26 @@ away, matching the same "show real failures" approach used in the fraud
 detection case study.
 """
 
+import asyncio
+import itertools
 import json
+import os
+import time
 from pathlib import Path
+from typing import Literal, Optional
 
 import joblib
+import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from batch_io import BatchParseError, detect_format, ndjson_line, ndjson_response, read_chunks, spool_upload
+from example_cache import ExampleResults
+from feature_encoder import FeatureEncoder
 
 MODEL_DIR = Path(__file__).resolve().parent / "anomaly_model_store"
 device = torch.device("cpu")
@@ -39,6 +51,42 @@ scaler = joblib.load(MODEL_DIR / "scaler.pkl")
 THRESHOLD = config["threshold"]
 CATEGORICAL_COLS = config["categorical_cols"]
 
+# Same "<col>_<value>" columns pd.get_dummies produced at training time.
+encoder = FeatureEncoder(feature_columns, categorical=CATEGORICAL_COLS)
+encoder.bind(scaler)
+
+NUMERIC_COLS = [c for c in feature_columns if not c.startswith(tuple(f"{col}_" for col in CATEGORICAL_COLS))]
+# StandardScaler as two arrays, applied to whole float32 chunks at once.
+SCALER_MEAN = scaler.mean_.astype(np.float32)
+SCALER_SCALE = scaler.scale_.astype(np.float32)
+
+# Column order of the raw NSL-KDD files (KDDTrain+.txt / KDDTest+.txt),
+# which have no header row: the 41 connection features, the attack label
+# ("normal" or the attack's name) and the difficulty score.
+NSL_KDD_COLUMNS = [
+    "duration", "protocol_type", "service", "flag", "src_bytes", "dst_bytes", "land",
+    "wrong_fragment", "urgent", "hot", "num_failed_logins", "logged_in", "num_compromised",
+    "root_shell", "su_attempted", "num_root", "num_file_creations", "num_shells",
+    "num_access_files", "num_outbound_cmds", "is_host_login", "is_guest_login", "count",
+    "srv_count", "serror_rate", "srv_serror_rate", "rerror_rate", "srv_rerror_rate",
+    "same_srv_rate", "diff_srv_rate", "srv_diff_host_rate", "dst_host_count",
+    "dst_host_srv_count", "dst_host_same_srv_rate", "dst_host_diff_srv_rate",
+    "dst_host_same_src_port_rate", "dst_host_srv_diff_host_rate", "dst_host_serror_rate",
+    "dst_host_srv_serror_rate", "dst_host_rerror_rate", "dst_host_srv_rerror_rate",
+    "label", "difficulty",
+]
+UPLOAD_CHUNK_ROWS = 4096
+
+# Live feed (/stream): records are scored in micro-batches of up to
+# STREAM_BATCH_ROWS, or whatever has arrived STREAM_BATCH_SECONDS after the
+# first one waiting, whichever comes first. At the defaults one CPU core
+# sustains ~30k rows/s, every row an alert (scripts/bench_anomaly.py).
+STREAM_BATCH_ROWS = int(os.getenv("ANOMALY_STREAM_BATCH_ROWS", "512"))
+STREAM_BATCH_SECONDS = float(os.getenv("ANOMALY_STREAM_BATCH_MS", "50")) / 1000
+STREAM_WINDOW = int(os.getenv("ANOMALY_STREAM_WINDOW", "10000"))  # rows the rolling stats cover
+STREAM_STATS_SECONDS = 1.0
+STREAM_MAX_LINE_BYTES = 64 * 1024
+
 
 class Autoencoder(nn.Module):
     """Same architecture used in training — must match exactly for the
@@ -71,20 +119,77 @@ model.load_state_dict(torch.load(MODEL_DIR / "best_autoencoder.pt", map_location
 model.eval()
 
 
-def _reconstruction_error(row: dict) -> float:
-    """Preprocess one raw NSL-KDD-style row exactly like training did
-    (one-hot encode, align to the saved 122-column layout, scale), then
-    return the model's reconstruction error for it."""
-    df = pd.DataFrame([row])
-    encoded = pd.get_dummies(df, columns=CATEGORICAL_COLS)
-    encoded = encoded.reindex(columns=feature_columns, fill_value=0)
-    scaled = scaler.transform(encoded)
+EXAMPLE_META_KEYS = ("index", "true_label", "predicted_label", "reconstruction_error", "correct")
+
+
+def _reconstruction_errors(rows: list[dict]) -> np.ndarray:
+    """Preprocess raw NSL-KDD-style rows exactly like training did (one-hot
+    encode, align to the saved 122-column layout, scale), then return the
+    model's reconstruction error for each."""
+    scaled = scaler.transform(encoder.encode_batch(rows, n=len(rows)))
 
     tensor = torch.tensor(scaled, dtype=torch.float32)
     with torch.no_grad():
         reconstructed = model(tensor)
-        error = torch.mean((tensor - reconstructed) ** 2, dim=1).item()
-    return error
+        errors = torch.mean((tensor - reconstructed) ** 2, dim=1)
+    return errors.numpy()
+
+
+def _reconstruction_error(row: dict) -> float:
+    return float(_reconstruction_errors([row])[0])
+
+
+def encode_frame(df: pd.DataFrame):
+    """
+    A chunk of raw connection records -> (scaled float32 matrix, valid).
+    Same encoding as the single-row path, done column-wise: one-hot via the
+    encoder's precompiled column map, then the scaler as plain arithmetic.
+    A numeric column the frame doesn't have is 0 for every row, like a key
+    missing from one row's dict (the live feed's records may be as sparse
+    as the demo examples; file uploads are checked with missing_columns
+    first). A row with a non-numeric value in a column it does have is
+    invalid.
+    """
+    n = len(df)
+    columns, valid = {}, np.ones(n, dtype=bool)
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+            valid &= np.isfinite(values)
+            columns[col] = values
+    for col in CATEGORICAL_COLS:
+        if col in df.columns:
+            columns[col] = df[col].astype(str).str.strip().to_numpy(dtype=object)
+    X = encoder.encode_columns(columns, n).astype(np.float32)
+    X -= SCALER_MEAN
+    X /= SCALER_SCALE
+    X[~valid] = 0  # keeps NaNs out of the forward pass; these rows are never reported
+    return X, valid
+
+
+def missing_columns(df: pd.DataFrame) -> list[str]:
+    return [c for c in NUMERIC_COLS + CATEGORICAL_COLS if c not in df.columns]
+
+
+def reconstruction_errors_scaled(X: np.ndarray) -> np.ndarray:
+    """Per-row mean squared reconstruction error for an already-scaled batch."""
+    tensor = torch.from_numpy(X)
+    with torch.inference_mode():
+        return torch.mean((tensor - model(tensor)) ** 2, dim=1).numpy()
+
+
+def _score_examples() -> dict:
+    rows = [{k: v for k, v in ex.items() if k not in EXAMPLE_META_KEYS} for ex in examples]
+    return {str(ex["index"]): float(e) for ex, e in zip(examples, _reconstruction_errors(rows))}
+
+
+# Every example's reconstruction error, computed once in one batch on first
+# use — a click on the demo is a dict lookup (see example_cache.py).
+example_errors = ExampleResults(
+    "anomaly",
+    [MODEL_DIR / name for name in ("best_autoencoder.pt", "scaler.pkl", "feature_columns.json", "examples.json")],
+    _score_examples,
+)
 
 
 @router.get("/metrics")
@@ -94,6 +199,7 @@ def get_metrics():
 
 @router.get("/examples")
 def get_examples():
+    example_errors.get()  # scores them now if the cache was cold, before the first click
     # Don't leak the answer to the frontend before the user runs it.
     return [
         {k: v for k, v in ex.items() if k not in ("predicted_label", "reconstruction_error", "correct")}
@@ -108,12 +214,13 @@ def predict(payload: dict):
     if match is None:
         raise HTTPException(status_code=400, detail=f"Unknown example index {index}")
 
-    row = {k: v for k, v in match.items() if k not in ("index", "true_label", "predicted_label", "reconstruction_error", "correct")}
-
-    try:
-        error = _reconstruction_error(row)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Inference failed: {e}")
+    error = example_errors.get().get(str(index))
+    if error is None:
+        row = {k: v for k, v in match.items() if k not in EXAMPLE_META_KEYS}
+        try:
+            error = _reconstruction_error(row)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Inference failed: {e}")
 
     predicted_label = "anomaly" if error > THRESHOLD else "normal"
 
@@ -125,3 +232,353 @@ def predict(payload: dict):
         "threshold": round(THRESHOLD, 4),
         "correct": predicted_label == match["true_label"],
     }
+
+
+@router.post("/predict/batch")
+def predict_batch(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    header: Optional[bool] = None,
+):
+    """
+    Score an NSL-KDD-format upload of any size: the raw KDDTrain+/KDDTest+
+    files as-is (no header row — header=None detects that), or a CSV/NDJSON
+    whose columns are named like NSL_KDD_COLUMNS. Rows are encoded, scaled
+    and pushed through the autoencoder UPLOAD_CHUNK_ROWS at a time.
+
+    Streams NDJSON back: per row, its reconstruction error and label against
+    THRESHOLD (plus the true label when the file has a label column), then a
+    summary with counts, the confusion matrix when labelled, and rows/sec.
+    """
+    fmt = detect_format(file, format)
+    spooled = spool_upload(file)
+    names = None
+    if fmt == "csv":
+        if header is None:
+            header = b"protocol_type" in spooled.readline()
+            spooled.seek(0)
+        names = None if header else NSL_KDD_COLUMNS
+
+    # Check the first chunk's columns before streaming starts, so a file
+    # that can't be scored is a 400 rather than a stream of rows encoded
+    # with whole features zeroed.
+    chunks = read_chunks(spooled, fmt, chunk_rows=UPLOAD_CHUNK_ROWS, names=names)
+    try:
+        first = next(chunks, None)
+    except BatchParseError as e:
+        spooled.close()
+        raise HTTPException(status_code=400, detail=f"Could not parse upload: {e}")
+    missing = missing_columns(first) if first is not None else []
+    if missing:
+        chunks.close()
+        spooled.close()
+        raise HTTPException(status_code=400, detail=f"Missing required column(s): {', '.join(missing)}")
+
+    def lines():
+        started = time.perf_counter()
+        total = scored = flagged = 0
+        confusion = {"tp": 0, "fp": 0, "fn": 0, "tn": 0}
+        labelled = False
+        for chunk in itertools.chain([first] if first is not None else [], chunks):
+            missing = missing_columns(chunk)
+            if missing:
+                # A later NDJSON chunk whose records all lack a key.
+                yield ndjson_line({"error": f"Missing required column(s): {', '.join(missing)}"})
+                return
+
+            X, valid = encode_frame(chunk)
+            errors = reconstruction_errors_scaled(X)
+            finite = np.isfinite(errors)
+            is_anomaly = errors > THRESHOLD
+            actual = None
+            if "label" in chunk.columns:
+                labelled = True
+                actual = chunk["label"].astype(str).str.strip().to_numpy() != "normal"
+            # One write per chunk, built from plain lists rather than
+            # per-element numpy lookups.
+            rows = chunk.index.tolist()
+            rounded = np.round(errors.astype(np.float64), 4).tolist()
+            predicted = np.where(is_anomaly, "anomaly", "normal").tolist()
+            truth = np.where(actual, "anomaly", "normal").tolist() if actual is not None else None
+            out = []
+            for i, row in enumerate(rows):
+                if not valid[i]:
+                    out.append(ndjson_line({"row": row, "error": "non-numeric value in a numeric column"}))
+                elif not finite[i]:
+                    out.append(ndjson_line({"row": row, "error": "reconstruction error is not finite"}))
+                else:
+                    line = {"row": row, "reconstruction_error": rounded[i], "predicted_label": predicted[i]}
+                    if truth is not None:
+                        line["true_label"] = truth[i]
+                    out.append(ndjson_line(line))
+            yield "".join(out)
+
+            valid &= finite
+            total += len(chunk)
+            scored += int(valid.sum())
+            flagged += int((is_anomaly & valid).sum())
+            if actual is not None:
+                confusion["tp"] += int((valid & is_anomaly & actual).sum())
+                confusion["fp"] += int((valid & is_anomaly & ~actual).sum())
+                confusion["fn"] += int((valid & ~is_anomaly & actual).sum())
+                confusion["tn"] += int((valid & ~is_anomaly & ~actual).sum())
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "rows": total,
+            "scored": scored,
+            "invalid": total - scored,
+            "anomalies": flagged,
+            "anomaly_rate": round(flagged / scored, 6) if scored else None,
+            "threshold": round(THRESHOLD, 4),
+            "rows_per_second": round(total / elapsed) if elapsed > 0 else None,
+        }
+        if labelled:
+            tp, fp, fn = confusion["tp"], confusion["fp"], confusion["fn"]
+            summary["confusion_matrix"] = confusion
+            summary["precision"] = round(tp / (tp + fp), 4) if tp + fp else None
+            summary["recall"] = round(tp / (tp + fn), 4) if tp + fn else None
+        yield ndjson_line({"summary": summary})
+
+    return ndjson_response(lines(), spooled)
+
+
+# ---------------------------------------------------------------------------
+# Live feed — micro-batched scoring with rolling statistics in ring buffers
+# ---------------------------------------------------------------------------
+class RollingStats:
+    """
+    Error percentiles and alert rate over the last `window` scored rows, and
+    throughput over the last 64 micro-batches, all in preallocated ring
+    buffers — memory is fixed however long the feed runs.
+    """
+
+    def __init__(self, window: int = STREAM_WINDOW):
+        self.errors = np.zeros(window, dtype=np.float32)
+        self.alerts = np.zeros(window, dtype=bool)
+        self.batch_rows = np.zeros(64, dtype=np.int64)
+        self.batch_times = np.zeros(64, dtype=np.float64)
+        self.pos = self.filled = self.batches = 0
+        self.total_rows = self.total_alerts = self.total_invalid = 0
+
+    def add(self, errors: np.ndarray, alerts: np.ndarray):
+        window = len(self.errors)
+        errors, alerts = errors[-window:], alerts[-window:]
+        idx = (self.pos + np.arange(len(errors))) % window
+        self.errors[idx] = errors
+        self.alerts[idx] = alerts
+        self.pos = (self.pos + len(errors)) % window
+        self.filled = min(window, self.filled + len(errors))
+        slot = self.batches % len(self.batch_rows)
+        self.batch_rows[slot] = len(errors)
+        self.batch_times[slot] = time.monotonic()
+        self.batches += 1
+
+    def snapshot(self) -> dict:
+        errors = self.errors[:self.filled]
+        size = len(self.batch_rows)
+        n = min(self.batches, size)
+        rate = None
+        if n > 1:
+            # Rows of every recorded batch but the oldest, over the time since it.
+            oldest = self.batches % size if self.batches > size else 0
+            newest = (self.batches - 1) % size
+            span = self.batch_times[newest] - self.batch_times[oldest]
+            if span > 0:
+                rate = round(float((self.batch_rows[:n].sum() - self.batch_rows[oldest]) / span))
+        p50, p90, p99 = np.percentile(errors, [50, 90, 99]) if self.filled else (None, None, None)
+        return {
+            "rows": self.total_rows,
+            "alerts": self.total_alerts,
+            "invalid": self.total_invalid,
+            "window_rows": self.filled,
+            "window_alert_rate": round(float(self.alerts[:self.filled].mean()), 6) if self.filled else None,
+            "error_p50": None if p50 is None else round(float(p50), 4),
+            "error_p90": None if p90 is None else round(float(p90), 4),
+            "error_p99": None if p99 is None else round(float(p99), 4),
+            "rows_per_second": rate,
+        }
+
+
+class StreamSession:
+    """
+    One live feed's state: records waiting for the next micro-batch and the
+    rolling stats. Transport-agnostic — the WebSocket and NDJSON endpoints
+    both just add() records, flush() when ready() says so (or the deadline
+    from time_left() passes) and send back the messages flush() returns.
+    """
+
+    def __init__(self):
+        self.pending: list = []
+        self.first_at = 0.0
+        self.seq = 0
+        self.stats = RollingStats()
+        self.last_stats_at = time.monotonic()
+        self.receiving: Optional[asyncio.Future] = None  # read in flight, see _receive()
+
+    def add(self, record):
+        if not self.pending:
+            self.first_at = time.monotonic()
+        self.pending.append((self.seq, record))
+        self.seq += 1
+
+    def ready(self) -> bool:
+        return len(self.pending) >= STREAM_BATCH_ROWS
+
+    def time_left(self) -> Optional[float]:
+        if not self.pending:
+            return None
+        return max(0.0, self.first_at + STREAM_BATCH_SECONDS - time.monotonic())
+
+    def flush(self, final: bool = False) -> list[dict]:
+        """Score everything pending. Returns the messages to send: one with
+        this batch's alerts and rejected records (if any), and the rolling
+        stats at most every STREAM_STATS_SECONDS (and always when final)."""
+        batch, self.pending = self.pending, []
+        messages = []
+        if batch:
+            seqs = [seq for seq, record in batch if isinstance(record, dict)]
+            rejected = [{"seq": seq, "error": "record must be a JSON object"} for seq, record in batch
+                        if not isinstance(record, dict)]
+            alerts = []
+            if seqs:
+                records = [record for _, record in batch if isinstance(record, dict)]
+                X, valid = encode_frame(pd.DataFrame.from_records(records))
+                errors = reconstruction_errors_scaled(X)
+                flagged = valid & (errors > THRESHOLD)
+                for i in np.flatnonzero(~valid):
+                    rejected.append({"seq": seqs[i], "error": "non-numeric value in a numeric column"})
+                for i in np.flatnonzero(flagged):
+                    alert = {"seq": seqs[i], "reconstruction_error": round(float(errors[i]), 4)}
+                    if "id" in records[i]:
+                        alert["id"] = records[i]["id"]
+                    alerts.append(alert)
+                self.stats.add(errors[valid], flagged[valid])
+                self.stats.total_rows += int(valid.sum())
+                self.stats.total_alerts += len(alerts)
+            self.stats.total_invalid += len(rejected)
+            if alerts or rejected:
+                messages.append({"alerts": alerts, "rejected": rejected} if rejected else {"alerts": alerts})
+        now = time.monotonic()
+        if final or now - self.last_stats_at >= STREAM_STATS_SECONDS:
+            self.last_stats_at = now
+            messages.append({"stats": {**self.stats.snapshot(), "threshold": round(THRESHOLD, 4)}})
+        return messages
+
+
+async def _receive(source, session: StreamSession):
+    """Await the next item from `source` (a coroutine function) until the
+    session's micro-batch deadline. Returns (done, item); item is None on a
+    timeout. The read itself is never cancelled — an unfinished one is kept
+    in session.receiving and picked up again next call — so no message is
+    lost and request.stream() isn't torn down by a timeout."""
+    if session.receiving is None:
+        session.receiving = asyncio.ensure_future(source())
+    finished, _ = await asyncio.wait({session.receiving}, timeout=session.time_left())
+    if not finished:
+        return False, None
+    task, session.receiving = session.receiving, None
+    return True, task.result()
+
+
+class _DuplexNDJSONResponse(StreamingResponse):
+    """StreamingResponse minus its disconnect listener. That listener reads
+    receive() concurrently with the body iterator, and here the body iterator
+    is itself reading the request stream — the two would race for the
+    request's body messages. A client going away still ends the request
+    stream, which ends the response."""
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+def _parse_feed_message(text: str) -> list:
+    """A WebSocket message or NDJSON line: one record, or a JSON array of them."""
+    value = json.loads(text)
+    return value if isinstance(value, list) else [value]
+
+
+@router.websocket("/stream")
+async def stream_ws(websocket: WebSocket):
+    """
+    Live connection-record feed. Send records as JSON text messages (one
+    object, or an array of them; an optional "id" is echoed on alerts).
+    Receive {"alerts": [...]} for rows over THRESHOLD as each micro-batch is
+    scored, and {"stats": {...}} with rolling percentiles, alert rate and
+    throughput about once a second.
+    """
+    await websocket.accept()
+    session = StreamSession()
+    try:
+        while True:
+            _, text = await _receive(websocket.receive_text, session)
+            if text is None:  # micro-batch deadline
+                for message in await run_in_threadpool(session.flush):
+                    await websocket.send_json(message)
+                continue
+            try:
+                records = _parse_feed_message(text)
+            except ValueError:
+                await websocket.send_json({"error": "message is not valid JSON"})
+                continue
+            for record in records:
+                session.add(record)
+                if session.ready():
+                    for message in await run_in_threadpool(session.flush):
+                        await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if session.receiving is not None:
+            session.receiving.cancel()
+
+
+@router.post("/stream")
+async def stream_ndjson(request: Request):
+    """
+    The same live feed over plain HTTP: stream NDJSON records in the request
+    body (chunked upload) and read alerts and stats back as NDJSON while
+    it's still being sent. Ends with a final stats line.
+    """
+    session = StreamSession()
+    chunks = request.stream().__aiter__()
+
+    async def lines():
+        buffer = b""
+        done = False
+        while not done:
+            try:
+                _, data = await _receive(chunks.__anext__, session)
+            except StopAsyncIteration:
+                data, done = None, True
+            complete = []
+            if data:
+                buffer += data
+                *complete, buffer = buffer.split(b"\n")
+                if len(buffer) > STREAM_MAX_LINE_BYTES:
+                    yield ndjson_line({"error": f"line longer than {STREAM_MAX_LINE_BYTES} bytes"})
+                    return
+            if done:
+                complete.append(buffer)
+            for line in complete:
+                if not line.strip():
+                    continue
+                try:
+                    records = _parse_feed_message(line)
+                except ValueError:
+                    yield ndjson_line({"error": "line is not valid JSON"})
+                    continue
+                for record in records:
+                    session.add(record)
+                    if session.ready():
+                        for message in await run_in_threadpool(session.flush):
+                            yield ndjson_line(message)
+            if done or data is None:  # end of feed, or micro-batch deadline
+                for message in await run_in_threadpool(session.flush, done):
+                    yield ndjson_line(message)
+
+    return _DuplexNDJSONResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,147 @@
+"""
+Shared plumbing for the bulk-scoring endpoints: take an uploaded CSV,
+NDJSON or Parquet file, read it back as fixed-size DataFrame chunks, and
+stream results out as NDJSON — one JSON object per line — so neither the
+upload nor the response ever has to sit in memory whole, however many rows
+it has.
+
+The routers own everything model-specific (validation, encoding, scoring);
+this module only moves rows in and lines out.
+"""
+
+import hashlib
+import json
+import shutil
+import tempfile
+from typing import Any, Iterable, Iterator, Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+BATCH_CHUNK_ROWS = 2000
+SPOOL_MAX_BYTES = 4 * 1024 * 1024  # bigger uploads spill to a temp file on disk
+
+FORMATS_BY_SUFFIX = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".json": "ndjson",
+    ".parquet": "parquet",
+}
+
+
+class BatchParseError(Exception):
+    """The upload stopped parsing partway through."""
+
+
+def detect_format(upload: UploadFile, override: Optional[str] = None, allowed=("csv", "ndjson")) -> str:
+    fmt = override or _guess_format(upload)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400, detail=f"Can't tell the file format — upload one of: {', '.join(allowed)}"
+        )
+    if fmt not in allowed:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}' — expected one of: {', '.join(allowed)}")
+    return fmt
+
+
+def _guess_format(upload: UploadFile) -> Optional[str]:
+    name = (upload.filename or "").lower()
+    for suffix, fmt in FORMATS_BY_SUFFIX.items():
+        if name.endswith(suffix):
+            return fmt
+    content_type = (upload.content_type or "").lower()
+    if "parquet" in content_type:
+        return "parquet"
+    if "csv" in content_type:
+        return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type or "json" in content_type:
+        return "ndjson"
+    return None
+
+
+def spool_upload(upload: UploadFile):
+    """
+    Copy the upload into a file this request owns. FastAPI closes the
+    UploadFile as soon as the endpoint returns — before a StreamingResponse
+    has read a single row — so the generator needs its own handle. Copied in
+    blocks, and spooled to disk past SPOOL_MAX_BYTES, so memory stays flat.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    upload.file.seek(0)
+    shutil.copyfileobj(upload.file, spooled)
+    spooled.seek(0)
+    return spooled
+
+
+def content_hash(fileobj) -> str:
+    """SHA-256 of a spooled upload's bytes, read in blocks; leaves the file
+    rewound for read_chunks."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(1 << 20), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def read_chunks(
+    fileobj, fmt: str, chunk_rows: int = BATCH_CHUNK_ROWS, dtype=None, names: Optional[list[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """Yield the file as DataFrames of at most chunk_rows rows. The index
+    keeps counting across chunks, so it doubles as the 0-based row number.
+    Pass names for a headerless CSV."""
+    try:
+        if fmt == "parquet":
+            yield from _read_parquet_chunks(fileobj, chunk_rows)
+            return
+        if fmt == "csv":
+            reader = pd.read_csv(
+                fileobj, chunksize=chunk_rows, dtype=dtype, skipinitialspace=True,
+                header=None if names else "infer", names=names, index_col=False,
+            )
+        else:
+            reader = pd.read_json(fileobj, lines=True, chunksize=chunk_rows, dtype=dtype or False)
+        with reader:
+            yield from reader
+    except (ValueError, OSError, pd.errors.ParserError) as e:
+        # Already streaming by now, so this can't become an HTTP error any
+        # more — surface it as a final line instead.
+        raise BatchParseError(str(e)) from e
+
+
+def _read_parquet_chunks(fileobj, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    # Record batches straight off the row groups — only one chunk is ever
+    # materialized, same as the CSV/NDJSON readers.
+    start = 0
+    for batch in pq.ParquetFile(fileobj).iter_batches(batch_size=chunk_rows):
+        df = batch.to_pandas()
+        df.index = pd.RangeIndex(start, start + len(df))
+        start += len(df)
+        yield df
+
+
+def ndjson_line(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False) + "\n"
+
+
+def ndjson_response(lines: Iterable[str], fileobj=None) -> StreamingResponse:
+    """Stream the generator's lines, turning a parse failure mid-file into
+    a final {"error": ...} line, and closing the spooled upload at the end."""
+
+    def body():
+        try:
+            yield from lines
+        except BatchParseError as e:
+            yield ndjson_line({"error": f"Could not parse upload: {e}"})
+        finally:
+            if fileobj is not None:
+                fileobj.close()
+
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
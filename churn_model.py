@@ -9,19 +9,32 @@ Models were trained/benchmarked in the companion churn-prediction project
 scikit-learn/xgboost versions pinned in this backend's requirements.txt.
 """
 
+import hashlib
 import json
+import os
+import threading
+import typing
+from collections import OrderedDict
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 
 import joblib
 import numpy as np
 import pandas as pd
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, File, HTTPException, UploadFile
 from pydantic import BaseModel, Field
-from xgboost import XGBClassifier
+from scipy import sparse
+from xgboost import DMatrix, XGBClassifier
+
+from batch_io import detect_format, ndjson_line, ndjson_response, read_chunks, spool_upload
+from feature_encoder import FeatureEncoder
+from xgb_scoring import XGBScorer
 
 MODEL_DIR = Path(__file__).resolve().parent / "churn_model_store"
 
+# "numpy" | "inplace" | "sklearn" — see xgb_scoring.py
+XGB_ENGINE = os.getenv("CHURN_XGB_ENGINE", "numpy")
+
 router = APIRouter(prefix="/api/churn", tags=["churn"])
 
 # ---------------------------------------------------------------------------
@@ -33,6 +46,7 @@ rf_model = joblib.load(MODEL_DIR / "random_forest_model.pkl")
 
 xgb_model = XGBClassifier()
 xgb_model.load_model(MODEL_DIR / "xgboost_model.json")
+xgb_scorer = XGBScorer(xgb_model, engine=XGB_ENGINE)
 
 feature_names: list[str] = json.load(open(MODEL_DIR / "feature_names.json"))
 metrics: dict = json.load(open(MODEL_DIR / "metrics.json"))
@@ -55,7 +69,7 @@ MODEL_REGISTRY = {
     },
     "xgboost": {
         "label": "XGBoost",
-        "estimator": xgb_model,
+        "estimator": xgb_scorer,
         "needs_scaling": False,
         "threshold": live_thresholds["xgboost"]["threshold"],
         "roc_auc": live_thresholds["xgboost"]["roc_auc"],
@@ -71,9 +85,14 @@ MULTI_CAT_COLS = [
 
 ModelKey = Literal["logistic_regression", "random_forest", "xgboost"]
 
+encoder = FeatureEncoder(feature_names, categorical=MULTI_CAT_COLS)
+encoder.bind(scaler)
+encoder.bind(rf_model)
+
 
 class CustomerInput(BaseModel):
     model: ModelKey = "logistic_regression"
+    explain: bool = False
     gender: Literal["Male", "Female"] = "Female"
     SeniorCitizen: Literal[0, 1] = 0
     Partner: Literal["Yes", "No"] = "No"
@@ -97,11 +116,42 @@ class CustomerInput(BaseModel):
     TotalCharges: float = Field(840.0, ge=0)
 
 
+class FeatureContribution(BaseModel):
+    feature: str
+    contribution: float
+
+
+class Explanation(BaseModel):
+    # "log_odds" for XGBoost and logistic regression, "probability" for the
+    # random forest — base_value + sum(contributions) is the model output
+    # in that space.
+    space: Literal["log_odds", "probability"]
+    base_value: float
+    contributions: list[FeatureContribution]
+
+
 class PredictionResponse(BaseModel):
     model_used: str
     churn_probability: float
     recommended_threshold: float
     prediction_at_recommended: Literal["Yes", "No"]
+    explanation: Optional[Explanation] = None
+
+
+# Per-field validation rules for the batch endpoint, read off CustomerInput
+# itself so a column is judged exactly like the single-row form would judge
+# it: allowed values for Literal fields, ge/le bounds for numeric ones.
+CUSTOMER_FIELDS = {}
+for _name, _field in CustomerInput.model_fields.items():
+    if _name in ("model", "explain"):
+        continue
+    _rule = {"default": _field.default, "type": _field.annotation}
+    if typing.get_origin(_field.annotation) is Literal:
+        _rule["allowed"] = typing.get_args(_field.annotation)
+    else:
+        _rule["ge"] = next((m.ge for m in _field.metadata if hasattr(m, "ge")), None)
+        _rule["le"] = next((m.le for m in _field.metadata if hasattr(m, "le")), None)
+    CUSTOMER_FIELDS[_name] = _rule
 
 
 def preprocess(payload: CustomerInput, needs_scaling: bool):
@@ -110,7 +160,9 @@ def preprocess(payload: CustomerInput, needs_scaling: bool):
     with one row, every categorical column has one unique value, so
     drop_first strips it entirely regardless of what the value actually is.
     Build the one-hot columns manually against the known training-time
-    feature set instead (see the original bugfix in the companion project).
+    feature set instead (see the original bugfix in the companion project) —
+    via the shared FeatureEncoder, which writes them straight into a NumPy
+    row instead of a one-row DataFrame.
     """
     row = payload.model_dump()
     encoded: dict[str, float] = {
@@ -124,14 +176,175 @@ def preprocess(payload: CustomerInput, needs_scaling: bool):
         encoded[col] = 1 if row[col] == "Yes" else 0
 
     for col in MULTI_CAT_COLS:
-        dummy_col = f"{col}_{row[col]}"
-        if dummy_col in feature_names:
-            encoded[dummy_col] = 1
+        encoded[col] = row[col]
 
-    df = pd.DataFrame([encoded])
-    df = df.reindex(columns=feature_names, fill_value=0)
+    X = encoder.encode(encoded)
+    return scaler.transform(X) if needs_scaling else X
 
-    return scaler.transform(df) if needs_scaling else df
+
+def validate_frame(df: pd.DataFrame):
+    """
+    Vectorized CustomerInput validation for one chunk of uploaded rows.
+    Returns (columns, errors): columns maps each field to a cleaned array,
+    errors is an object array holding the first problem found in each row
+    (None for a valid row). A missing column falls back to the field's
+    default for every row, same as an omitted JSON key would.
+    """
+    n = len(df)
+    columns = {}
+    errors = np.full(n, None, dtype=object)
+    for name, rule in CUSTOMER_FIELDS.items():
+        if name not in df.columns:
+            columns[name] = np.full(n, rule["default"], dtype=object if isinstance(rule["default"], str) else None)
+            continue
+        raw = df[name]
+        if "allowed" in rule:
+            allowed = rule["allowed"]
+            if isinstance(allowed[0], str):
+                values = raw.astype(str).str.strip().to_numpy(dtype=object)
+            else:
+                values = pd.to_numeric(raw, errors="coerce").to_numpy()
+            ok = np.isin(values, allowed)
+        else:
+            values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64)
+            ok = ~np.isnan(values)
+            if rule["ge"] is not None:
+                ok &= values >= rule["ge"]
+            if rule["le"] is not None:
+                ok &= values <= rule["le"]
+            if rule["type"] is int:
+                ok &= values == np.floor(values)
+        bad = ~ok & (errors == None)  # noqa: E711 — elementwise on an object array
+        for i in np.flatnonzero(bad):
+            errors[i] = f"invalid {name}: {raw.iloc[i]!r}"
+        columns[name] = values
+    return columns, errors
+
+
+def encode_columns(columns: dict, needs_scaling: bool) -> np.ndarray:
+    """Batch counterpart of preprocess(): same encoding, whole columns at once."""
+    n = len(next(iter(columns.values())))
+    encoded = {
+        "gender": (columns["gender"] == "Male").astype(np.float64),
+        "SeniorCitizen": columns["SeniorCitizen"],
+        "tenure": columns["tenure"],
+        "MonthlyCharges": columns["MonthlyCharges"],
+        "TotalCharges": columns["TotalCharges"],
+    }
+    for col in BINARY_COLS:
+        encoded[col] = (columns[col] == "Yes").astype(np.float64)
+    for col in MULTI_CAT_COLS:
+        encoded[col] = columns[col]
+    X = encoder.encode_columns(encoded, n)
+    return scaler.transform(X) if needs_scaling else X
+
+
+# ---------------------------------------------------------------------------
+# Explanations — additive per-feature contributions, exact for each model:
+# base_value + sum(contributions) reproduces the model's own output.
+# ---------------------------------------------------------------------------
+def _explain_xgboost(X: np.ndarray):
+    # TreeSHAP, computed by XGBoost itself. Last column is the bias.
+    contribs = xgb_model.get_booster().predict(DMatrix(X, feature_names=feature_names), pred_contribs=True)
+    return contribs[:, -1], contribs[:, :-1]
+
+
+def _explain_logistic_regression(X_scaled: np.ndarray):
+    coef = lr_model.coef_[0]
+    return np.full(len(X_scaled), lr_model.intercept_[0]), X_scaled * coef
+
+
+def _flatten_forest(forest):
+    """
+    Tree-path (Saabas) attribution as a single sparse (all nodes x features)
+    matrix: every node of every tree, in decision_path's node order, credits
+    the change in P(churn) caused by its parent's split to the feature that
+    parent split on. Averaged over trees, so it sums to predict_proba.
+    """
+    parent_feature, delta, roots = [], [], []
+    for est in forest.estimators_:
+        tree = est.tree_
+        value = tree.value[:, 0, :]
+        p = value[:, 1] / value.sum(axis=1)
+        parent = np.full(tree.node_count, -1)
+        for side in (tree.children_left, tree.children_right):
+            internal = side != -1
+            parent[side[internal]] = np.flatnonzero(internal)
+        is_root = parent == -1
+        parent_feature.append(np.where(is_root, 0, tree.feature[parent]))
+        delta.append(np.where(is_root, 0.0, p - p[parent]))
+        roots.append(p[0])
+    delta = np.concatenate(delta) / len(forest.estimators_)
+    attribution = sparse.csr_matrix(
+        (delta, (np.arange(len(delta)), np.concatenate(parent_feature))),
+        shape=(len(delta), forest.n_features_in_),
+    )
+    return attribution, float(np.mean(roots))
+
+
+_rf_attribution, _rf_base = _flatten_forest(rf_model)
+
+
+def _explain_random_forest(X: np.ndarray):
+    # decision_path marks every node each row visits across all trees, so
+    # one sparse product attributes the whole batch.
+    paths = rf_model.decision_path(X)[0]
+    return np.full(len(X), _rf_base), (paths @ _rf_attribution).toarray()
+
+
+EXPLAINERS = {
+    "logistic_regression": ("log_odds", _explain_logistic_regression),
+    "random_forest": ("probability", _explain_random_forest),
+    "xgboost": ("log_odds", _explain_xgboost),
+}
+
+# Encoded column -> the request field it came from, so one-hot dummies are
+# reported as a single "Contract" contribution rather than three columns.
+_field_of_column = np.array([
+    next((f for f in MULTI_CAT_COLS if name.startswith(f + "_")), name) for name in feature_names
+])
+_explained_fields, _column_to_field = np.unique(_field_of_column, return_inverse=True)
+
+
+EXPLANATION_CACHE_SIZE = 4096
+_explanation_cache: "OrderedDict[tuple[str, str], Explanation]" = OrderedDict()
+# Handlers run on FastAPI's threadpool; without this, an eviction between a
+# lookup and its move_to_end raises KeyError for a perfectly good request.
+_explanation_lock = threading.Lock()
+
+
+def _build_explanation(model_key: str, X: np.ndarray) -> Explanation:
+    space, explainer = EXPLAINERS[model_key]
+    base, contribs = explainer(X)
+    by_field = np.bincount(_column_to_field, weights=contribs[0], minlength=len(_explained_fields))
+    order = np.argsort(-np.abs(by_field))
+    return Explanation(
+        space=space,
+        base_value=round(float(base[0]), 6),
+        contributions=[
+            FeatureContribution(feature=str(_explained_fields[i]), contribution=round(float(by_field[i]), 6))
+            for i in order
+        ],
+    )
+
+
+def explain(model_key: str, X: np.ndarray) -> Explanation:
+    """Explain one encoded (and, for LR, scaled) row. LRU-cached on a hash
+    of the encoded row, so repeated what-ifs that land on the same encoding
+    are free."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    key = (model_key, hashlib.blake2b(X.tobytes(), digest_size=16).hexdigest())
+    with _explanation_lock:
+        cached = _explanation_cache.get(key)
+        if cached is not None:
+            _explanation_cache.move_to_end(key)
+            return cached
+    explanation = _build_explanation(model_key, X)
+    with _explanation_lock:
+        _explanation_cache[key] = explanation
+        if len(_explanation_cache) > EXPLANATION_CACHE_SIZE:
+            _explanation_cache.popitem(last=False)
+    return explanation
 
 
 @router.get("/models")
@@ -153,6 +366,7 @@ def predict(payload: CustomerInput):
     try:
         X = preprocess(payload, needs_scaling=config["needs_scaling"])
         prob = float(config["estimator"].predict_proba(X)[:, 1][0])
+        explanation = explain(payload.model, X) if payload.explain else None
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction failed: {e}")
 
@@ -162,4 +376,85 @@ def predict(payload: CustomerInput):
         churn_probability=round(prob, 4),
         recommended_threshold=threshold,
         prediction_at_recommended="Yes" if prob >= threshold else "No",
+        explanation=explanation,
     )
+
+
+@router.post("/predict/batch")
+def predict_batch(
+    file: UploadFile = File(...),
+    model: Literal["logistic_regression", "random_forest", "xgboost", "all"] = "logistic_regression",
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    id_column: str = "customerID",
+):
+    """
+    Score a whole customer book in one upload (CSV with a header row, or
+    NDJSON with one customer object per line, same fields as /predict).
+
+    Streams NDJSON back: one line per input row — its probability and
+    thresholded decision, or the validation error that kept it from being
+    scored — then one final summary line. Rows are validated, encoded and
+    scored in chunks of BATCH_CHUNK_ROWS with a single predict_proba call
+    per chunk per model, so memory stays flat however large the file is.
+    model=all scores every model in MODEL_REGISTRY side by side.
+    """
+    fmt = detect_format(file, format)
+    keys = list(MODEL_REGISTRY) if model == "all" else [model]
+    spooled = spool_upload(file)
+
+    def lines():
+        total = scored = 0
+        churn_counts = {key: 0 for key in keys}
+        for chunk in read_chunks(spooled, fmt):
+            columns, errors = validate_frame(chunk)
+            valid = errors == None  # noqa: E711
+            row_numbers = chunk.index.to_numpy()
+            ids = chunk[id_column].astype(str).to_numpy() if id_column in chunk.columns else None
+
+            probs = {}
+            if valid.any():
+                valid_columns = {name: values[valid] for name, values in columns.items()}
+                for key in keys:
+                    config = MODEL_REGISTRY[key]
+                    X = encode_columns(valid_columns, needs_scaling=config["needs_scaling"])
+                    p = np.full(len(chunk), np.nan)
+                    p[valid] = config["estimator"].predict_proba(X)[:, 1]
+                    probs[key] = p
+
+            for i in range(len(chunk)):
+                line = {"row": int(row_numbers[i])}
+                if ids is not None:
+                    line[id_column] = ids[i]
+                if not valid[i]:
+                    line["error"] = errors[i]
+                    yield ndjson_line(line)
+                    continue
+                predictions = {}
+                for key in keys:
+                    prob = float(probs[key][i])
+                    threshold = MODEL_REGISTRY[key]["threshold"]
+                    churn = prob >= threshold
+                    churn_counts[key] += churn
+                    predictions[key] = {
+                        "churn_probability": round(prob, 4),
+                        "prediction_at_recommended": "Yes" if churn else "No",
+                    }
+                if model == "all":
+                    line["predictions"] = predictions
+                else:
+                    line.update(predictions[model])
+                yield ndjson_line(line)
+            total += len(chunk)
+            scored += int(valid.sum())
+
+        yield ndjson_line({
+            "summary": {
+                "rows": total,
+                "scored": scored,
+                "invalid": total - scored,
+                "predicted_churn": churn_counts,
+                "thresholds": {key: MODEL_REGISTRY[key]["threshold"] for key in keys},
+            }
+        })
+
+    return ndjson_response(lines(), spooled)
@@ -10,20 +10,97 @@ cosine similarity to find the closest matches.
 Images live in clip_model_store/images/ — drop any real photos in that
 folder and they become searchable automatically on the next server start,
 no code changes needed.
+
+Embeddings are persisted to a sidecar file (EMBEDDING_CACHE) keyed by each
+image's content hash and the CLIP model id, so a restart only embeds images
+that are new or changed since the last one; removed images drop out of the
+file. An unchanged file (same name, size and mtime) isn't even re-read to
+hash it, so restarting on an unchanged gallery skips straight to serving.
+
+Search is exact (every image against the query) up to ANN_MIN_IMAGES; past
+that, an IVF-PQ index (ann_index.py) shortlists ANN_RERANK x top_k images
+and only those are scored exactly. CLIP_ANN_NPROBE (or a request's
+"nprobe") trades recall for latency. The index's quantizers and codes are
+persisted next to the embedding cache and topped up for new images, the
+same way.
+
+Embedding itself is pipelined: a thread pool decodes and preprocesses the
+next batches (large JPEGs decoded in PIL's draft mode, straight at the
+smallest 1/2-1/8 scale that still covers CLIP's 224px input) while the
+model runs on the current one. CLIP_EMBED_BATCH and CLIP_DECODE_WORKERS
+size it, and each run logs its images/sec.
+
+Result tiles don't need the full-resolution photo: /image/{id}?size=N
+serves a WebP thumbnail at one of THUMB_SIZES, generated on first request
+and cached on disk by content hash. Every image response carries a strong
+ETag (conditional requests get a 304), and a URL that pins the content
+with ?v=<version> (as listed in /images and search results) is cacheable
+for a year.
+
+A fixed tag vocabulary (CLIP_TAGS) is scored against every image at index
+time: the tags' prompt embeddings are cached on disk like the images', and
+each image's zero-shot softmax over the vocabulary is kept as a float16
+[N, T] matrix. Tag facets (/tags), browsing a tag (/tags/{tag}) and
+"tags" filters on either search never touch the model, and a text query
+that is just a tag reuses its embedding. Other query texts go through an
+LRU cache, so repeated searches skip the text encoder too.
+
+Everything above is computed from the float32 embeddings at load; after
+that the gallery's vectors are served from an EmbeddingStore
+(embedding_store.py) in CLIP_EMBEDDING_DTYPE — float16 by default, or int8
+with a per-vector scale — for a half or a quarter of the memory.
 """
 
+import hashlib
 import json
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
+import numpy as np
 import torch
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from fastapi.responses import FileResponse
-from PIL import Image
+from PIL import Image, ImageOps
 from transformers import CLIPModel, CLIPProcessor
 
+from ann_index import IVFPQIndex
+from embedding_store import EmbeddingStore
+
 MODEL_DIR = Path(__file__).resolve().parent / "clip_model_store"
 IMAGE_DIR = MODEL_DIR / "images"
 VALID_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+CLIP_MODEL_ID = "openai/clip-vit-base-patch32"
+EMBEDDING_CACHE = MODEL_DIR / "embedding_cache" / f"{CLIP_MODEL_ID.replace('/', '--')}.npz"
+ANN_CACHE = EMBEDDING_CACHE.with_name(f"{EMBEDDING_CACHE.stem}-ivfpq.npz")
+ANN_MIN_IMAGES = int(os.getenv("CLIP_ANN_MIN_IMAGES", "5000"))
+ANN_NPROBE = int(os.getenv("CLIP_ANN_NPROBE", "4"))
+ANN_RERANK = 4
+ANN_SUBSPACES = 64
+CLIP_EMBEDDING_DTYPE = os.getenv("CLIP_EMBEDDING_DTYPE", "float16")
+CLIP_EMBED_BATCH = int(os.getenv("CLIP_EMBED_BATCH", "16"))
+CLIP_DECODE_WORKERS = int(os.getenv("CLIP_DECODE_WORKERS", str(min(4, os.cpu_count() or 1))))
+CLIP_INPUT_SIZE = 224
+THUMB_DIR = MODEL_DIR / "thumbnails"
+THUMB_SIZES = (128, 256, 512)
+THUMB_QUALITY = 80
+VERSION_CHARS = 16
+DEFAULT_TAGS = (
+    "dog", "cat", "bird", "horse", "animal", "person", "people", "child", "portrait", "crowd",
+    "beach", "ocean", "lake", "river", "mountain", "forest", "desert", "snow", "sky", "sunset",
+    "night", "city", "street", "building", "architecture", "interior", "kitchen", "car", "bicycle", "boat",
+    "airplane", "train", "food", "drink", "flower", "tree", "garden", "sport", "art", "text",
+)
+CLIP_TAGS = [t.strip() for t in os.getenv("CLIP_TAGS", ",".join(DEFAULT_TAGS)).split(",") if t.strip()]
+TAG_PROMPT = "a photo of {}"
+TAG_MIN_PROB = 0.1  # an image "has" a tag when the zero-shot softmax gives it at least this
+TAG_CACHE = EMBEDDING_CACHE.with_name(f"{EMBEDDING_CACHE.stem}-tags.npz")
+TEXT_CACHE_SIZE = int(os.getenv("CLIP_TEXT_CACHE_SIZE", "1024"))
 
 router = APIRouter(prefix="/api/clip-search", tags=["clip-search"])
 
@@ -31,7 +108,12 @@ READY = False
 model = None
 processor = None
 image_paths: list[Path] = []
-image_embeddings = None  # [N, 512], L2-normalized
+image_embeddings = None  # EmbeddingStore of the [N, 512] L2-normalized image vectors
+image_hashes: list[str] = []
+ann_index = None  # IVFPQIndex over image_embeddings, for galleries of ANN_MIN_IMAGES or more
+tag_index: dict[str, int] = {}  # tag -> column of tag_embeddings / tag_probs
+tag_embeddings = None  # [T, 512], L2-normalized
+tag_probs = None  # [N, T] float16, each image's zero-shot softmax over CLIP_TAGS
 
 
 def _load_images():
@@ -40,18 +122,305 @@ def _load_images():
     return sorted([p for p in IMAGE_DIR.iterdir() if p.suffix.lower() in VALID_EXTS])
 
 
-def _embed_images(paths, batch_size=8):
+def _decode(path):
+    image = Image.open(path)
+    if image.format == "JPEG":
+        # Let libjpeg skip the resolution CLIP would throw away anyway
+        image.draft("RGB", (CLIP_INPUT_SIZE, CLIP_INPUT_SIZE))
+    return image.convert("RGB")
+
+
+def _prepare_batch(paths):
+    return processor(images=[_decode(p) for p in paths], return_tensors="pt")["pixel_values"]
+
+
+def _embed_images(paths, batch_size=None):
+    batch_size = batch_size or CLIP_EMBED_BATCH
+    batches = [paths[i : i + batch_size] for i in range(0, len(paths), batch_size)]
+    start = time.perf_counter()
     all_embeds = []
-    with torch.no_grad():
-        for i in range(0, len(paths), batch_size):
-            batch = [Image.open(p).convert("RGB") for p in paths[i : i + batch_size]]
-            inputs = processor(images=batch, return_tensors="pt")
-            features = model.get_image_features(**inputs)
+    with ThreadPoolExecutor(max_workers=CLIP_DECODE_WORKERS) as pool, torch.no_grad():
+        # Keep one batch per worker in preparation, plus the one being embedded
+        pending = deque(pool.submit(_prepare_batch, batch) for batch in batches[: CLIP_DECODE_WORKERS + 1])
+        queued = len(pending)
+        while pending:
+            pixel_values = pending.popleft().result()
+            if queued < len(batches):
+                pending.append(pool.submit(_prepare_batch, batches[queued]))
+                queued += 1
+            features = model.get_image_features(pixel_values=pixel_values)
             features = features / features.norm(dim=-1, keepdim=True)
             all_embeds.append(features)
+    if all_embeds:
+        elapsed = time.perf_counter() - start
+        print(f"🖼️ clip_search: embedded {len(paths)} images in {elapsed:.1f}s ({len(paths) / elapsed:.1f} images/sec)")
     return torch.cat(all_embeds, dim=0) if all_embeds else None
 
 
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_embedding_cache() -> dict:
+    """The sidecar's arrays (names, sizes, mtimes, hashes, embeddings), or {} if there's no usable one."""
+    try:
+        with np.load(EMBEDDING_CACHE) as data:
+            if str(data["model_id"]) != CLIP_MODEL_ID:
+                return {}
+            return {key: data[key] for key in ("names", "sizes", "mtimes", "hashes", "embeddings")}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _write_embedding_cache(paths, stats, hashes, embeddings):
+    try:
+        EMBEDDING_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = EMBEDDING_CACHE.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                model_id=np.array(CLIP_MODEL_ID),
+                names=np.array([p.name for p in paths]),
+                sizes=np.array([st.st_size for st in stats], dtype=np.int64),
+                mtimes=np.array([st.st_mtime_ns for st in stats], dtype=np.int64),
+                hashes=np.array(hashes),
+                embeddings=embeddings,
+            )
+        os.replace(tmp, EMBEDDING_CACHE)
+    except OSError as e:
+        print(f"⚠️ clip_search: could not save embedding cache: {e}")
+
+
+def _index_images(paths):
+    """
+    Embeddings for `paths`, in order: reused from EMBEDDING_CACHE by content
+    hash where possible, computed with _embed_images for the rest, plus the
+    hashes. The cache is then rewritten to hold exactly the current gallery.
+    """
+    cache = _read_embedding_cache()
+    known_hashes, known_embeddings = {}, {}
+    if cache:
+        for name, size, mtime, digest, embedding in zip(
+            cache["names"].tolist(), cache["sizes"].tolist(), cache["mtimes"].tolist(),
+            cache["hashes"].tolist(), cache["embeddings"],
+        ):
+            known_hashes[(name, size, mtime)] = digest
+            known_embeddings[digest] = embedding
+
+    stats = [p.stat() for p in paths]
+    hashes = [
+        known_hashes.get((p.name, st.st_size, st.st_mtime_ns)) or _file_digest(p)
+        for p, st in zip(paths, stats)
+    ]
+    first_path = {}
+    for p, digest in zip(paths, hashes):
+        if digest not in known_embeddings:
+            first_path.setdefault(digest, p)
+    if first_path:
+        fresh = _embed_images(list(first_path.values())).numpy().astype(np.float32)
+        known_embeddings.update(zip(first_path, fresh))
+    embeddings = np.stack([known_embeddings[digest] for digest in hashes]).astype(np.float32)
+
+    unchanged = (
+        cache
+        and not first_path
+        and cache["names"].tolist() == [p.name for p in paths]
+        and cache["mtimes"].tolist() == [st.st_mtime_ns for st in stats]
+    )
+    if not unchanged:
+        _write_embedding_cache(paths, stats, hashes, embeddings)
+    print(f"🖼️ clip_search: {len(paths)} images, {len(first_path)} embedded, the rest from cache")
+    return torch.from_numpy(embeddings), hashes
+
+
+def _load_ann_index(embeddings, hashes):
+    """
+    IVFPQIndex over the gallery, or None below ANN_MIN_IMAGES where exact
+    search is just as quick. Quantizers and per-image codes are saved to
+    ANN_CACHE: a restart encodes only images with no saved code, and
+    retrains only without a usable saved index or once the gallery has
+    outgrown its number of lists.
+    """
+    if len(hashes) < ANN_MIN_IMAGES:
+        return None
+    nlist = int(np.sqrt(len(hashes)))
+    try:
+        index, extra = IVFPQIndex.load(ANN_CACHE)
+        known = {digest: row for row, digest in enumerate(extra["hashes"].tolist())}
+        if index.nlist < nlist // 2 or index.codebooks.shape[2] * index.m != embeddings.shape[1]:
+            raise ValueError("index outgrown")
+    except (OSError, ValueError, KeyError):
+        print(f"🧭 clip_search: training IVF-PQ index ({nlist} lists) over {len(hashes)} images")
+        index, known = IVFPQIndex(nlist=nlist, m=ANN_SUBSPACES), {}
+        index.train(embeddings.numpy())
+
+    rows = [known.get(digest) for digest in hashes]
+    fresh = [i for i, row in enumerate(rows) if row is None]
+    kept = [i for i, row in enumerate(rows) if row is not None]
+    assign = np.empty(len(hashes), dtype=np.int32)
+    codes = np.empty((len(hashes), index.m), dtype=np.uint8)
+    if kept:
+        source = np.array([rows[i] for i in kept])
+        assign[kept], codes[kept] = index.assign[source], index.codes[source]
+    if fresh:
+        assign[fresh], codes[fresh] = index.encode(embeddings[fresh].numpy())
+    index.clear()
+    index.add(assign=assign, codes=codes)
+
+    if fresh or len(known) != len(hashes):
+        try:
+            with open(ANN_CACHE.with_suffix(f".{os.getpid()}.tmp"), "wb") as f:
+                index.save(f, hashes=np.array(hashes))
+            os.replace(f.name, ANN_CACHE)
+        except OSError as e:
+            print(f"⚠️ clip_search: could not save ANN index: {e}")
+    return index
+
+
+def _encode_texts(texts: list[str]) -> torch.Tensor:
+    with torch.no_grad():
+        inputs = processor(text=texts, return_tensors="pt", padding=True)
+        features = model.get_text_features(**inputs)
+    return features / features.norm(dim=-1, keepdim=True)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _text_embedding(text: str) -> torch.Tensor:
+    return _encode_texts([text])[0]
+
+
+def _query_embedding(query: str) -> torch.Tensor:
+    column = tag_index.get(query.lower())
+    return tag_embeddings[column] if column is not None else _text_embedding(query)
+
+
+def _load_tag_index(image_vectors):
+    """
+    Tag prompt embeddings (from TAG_CACHE where present, else encoded and
+    saved) and every image's zero-shot probabilities over the vocabulary.
+    """
+    cached = {}
+    try:
+        with np.load(TAG_CACHE) as data:
+            if str(data["model_id"]) == CLIP_MODEL_ID and str(data["prompt"]) == TAG_PROMPT:
+                cached = dict(zip(data["tags"].tolist(), data["embeddings"]))
+    except (OSError, ValueError, KeyError):
+        pass
+
+    missing = [tag for tag in CLIP_TAGS if tag not in cached]
+    if missing:
+        cached.update(zip(missing, _encode_texts([TAG_PROMPT.format(tag) for tag in missing]).numpy()))
+        try:
+            TAG_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            with open(TAG_CACHE.with_suffix(f".{os.getpid()}.tmp"), "wb") as f:
+                np.savez(
+                    f, model_id=np.array(CLIP_MODEL_ID), prompt=np.array(TAG_PROMPT),
+                    tags=np.array(CLIP_TAGS), embeddings=np.stack([cached[tag] for tag in CLIP_TAGS]),
+                )
+            os.replace(f.name, TAG_CACHE)
+        except OSError as e:
+            print(f"⚠️ clip_search: could not save tag embeddings: {e}")
+
+    embeddings = torch.from_numpy(np.stack([cached[tag] for tag in CLIP_TAGS]).astype(np.float32))
+    with torch.no_grad():
+        logits = model.logit_scale.exp() * (image_vectors @ embeddings.T)
+    return {tag.lower(): i for i, tag in enumerate(CLIP_TAGS)}, embeddings, logits.softmax(dim=1).to(torch.float16)
+
+
+def _tag_columns(tags) -> list[int]:
+    unknown = [tag for tag in tags if str(tag).lower() not in tag_index]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown tag(s) {unknown}; see /api/clip-search/tags")
+    return [tag_index[str(tag).lower()] for tag in tags]
+
+
+def _tag_mask(tags):
+    """Boolean [N] mask of images carrying every tag in `tags`, or None when there's no filter."""
+    if not tags:
+        return None
+    return (tag_probs[:, _tag_columns(tags)] >= TAG_MIN_PROB).all(dim=1)
+
+
+def _nprobe(payload: dict) -> int:
+    """The request's nprobe (default ANN_NPROBE), which must be a positive integer."""
+    try:
+        nprobe = int(payload.get("nprobe", ANN_NPROBE))
+    except (TypeError, ValueError):
+        nprobe = 0
+    if nprobe < 1:
+        raise HTTPException(status_code=400, detail="nprobe must be a positive integer")
+    return nprobe
+
+
+def _thumbnail(image_id: int, size: int) -> Path:
+    """Path of image_id's WebP thumbnail (longest side `size`), generating it on first use."""
+    path = THUMB_DIR / f"{image_hashes[image_id]}-{size}.webp"
+    if path.exists():
+        return path
+    image = Image.open(image_paths[image_id])
+    if image.format == "JPEG":
+        image.draft("RGB", (size, size))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGBA" if image.mode in ("RGBA", "LA") or "transparency" in image.info else "RGB")
+    image.thumbnail((size, size), Image.LANCZOS)
+    THUMB_DIR.mkdir(parents=True, exist_ok=True)
+    # A temp file of its own per call: get_image runs in the threadpool, so
+    # two first requests for the same thumbnail can race to write it.
+    with tempfile.NamedTemporaryFile(dir=THUMB_DIR, suffix=".tmp", delete=False) as tmp:
+        try:
+            image.save(tmp, "WEBP", quality=THUMB_QUALITY)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, path)
+    return path
+
+
+def _prune_thumbnails():
+    """Delete cached thumbnails of images no longer in the gallery."""
+    if not THUMB_DIR.exists():
+        return
+    current = set(image_hashes)
+    for path in THUMB_DIR.glob("*.webp"):
+        if path.name.rsplit("-", 1)[0] not in current:
+            path.unlink(missing_ok=True)
+
+
+def _image_tags(image_id: int, limit: int = 3) -> list[str]:
+    probs = tag_probs[image_id].float()
+    top = probs.topk(min(limit, len(CLIP_TAGS)))
+    return [CLIP_TAGS[i] for p, i in zip(top.values.tolist(), top.indices.tolist()) if p >= TAG_MIN_PROB]
+
+
+def _result(image_id: int, score: float) -> dict:
+    return {
+        "id": image_id,
+        "filename": image_paths[image_id].name,
+        "version": image_hashes[image_id][:VERSION_CHARS],
+        "tags": _image_tags(image_id),
+        "score": round(score, 4),
+    }
+
+
+def _top_matches(query, k: int, nprobe: int = ANN_NPROBE, mask=None):
+    """
+    (scores, ids) of the k images closest to query ([512], unit length),
+    best first — among those where mask ([N] bool) is set, if given, which
+    is searched exactly.
+    """
+    if mask is not None:
+        return image_embeddings.topk(query, k, torch.nonzero(mask).squeeze(1))
+    if ann_index is None:
+        return image_embeddings.topk(query, k)
+    _, ids = ann_index.search(query.numpy(), k * ANN_RERANK, nprobe)
+    return image_embeddings.topk(query, k, torch.from_numpy(ids.astype(np.int64)))
+
+
 LOAD_ATTEMPTED = False
 
 
@@ -65,7 +434,8 @@ def _ensure_loaded():
     clip_model_store/images/ for it to search over. No point holding a full
     CLIP model in memory for a feature that has no content to serve yet.
     """
-    global READY, LOAD_ATTEMPTED, model, processor, image_paths, image_embeddings
+    global READY, LOAD_ATTEMPTED, model, processor, image_paths, image_embeddings, image_hashes, ann_index
+    global tag_index, tag_embeddings, tag_probs
 
     if LOAD_ATTEMPTED:
         return
@@ -77,10 +447,14 @@ def _ensure_loaded():
         return
 
     try:
-        model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-        processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
+        model = CLIPModel.from_pretrained(CLIP_MODEL_ID)
+        processor = CLIPProcessor.from_pretrained(CLIP_MODEL_ID)
         model.eval()
-        image_embeddings = _embed_images(image_paths)
+        vectors, image_hashes = _index_images(image_paths)
+        ann_index = _load_ann_index(vectors, image_hashes)
+        _prune_thumbnails()
+        tag_index, tag_embeddings, tag_probs = _load_tag_index(vectors)
+        image_embeddings = EmbeddingStore(vectors, CLIP_EMBEDDING_DTYPE)
         READY = True
     except Exception as e:
         print(f"clip_search: failed to load CLIP ({e}) — search demo will report unavailable")
@@ -89,7 +463,12 @@ def _ensure_loaded():
 @router.get("/status")
 def get_status():
     _ensure_loaded()
-    return {"ready": READY, "image_count": len(image_paths)}
+    return {
+        "ready": READY,
+        "image_count": len(image_paths),
+        "search": "ivfpq" if ann_index is not None else "exact",
+        "storage": image_embeddings.dtype if image_embeddings is not None else None,
+    }
 
 
 @router.get("/images")
@@ -97,15 +476,53 @@ def list_images():
     _ensure_loaded()
     if not READY:
         raise HTTPException(status_code=503, detail="CLIP search not ready (no images loaded)")
-    return [{"id": i, "filename": p.name} for i, p in enumerate(image_paths)]
+    return [
+        {"id": i, "filename": p.name, "version": image_hashes[i][:VERSION_CHARS]} for i, p in enumerate(image_paths)
+    ]
 
 
 @router.get("/image/{image_id}")
-def get_image(image_id: int):
+def get_image(image_id: int, request: Request, size: Optional[int] = None, v: Optional[str] = None):
     _ensure_loaded()
     if not READY or image_id < 0 or image_id >= len(image_paths):
         raise HTTPException(status_code=404, detail="Image not found")
-    return FileResponse(image_paths[image_id])
+    if size is not None and size not in THUMB_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {list(THUMB_SIZES)}")
+
+    digest = image_hashes[image_id]
+    etag = f'"{digest[:32]}-{size}"' if size else f'"{digest[:32]}"'
+    # Ids are positions in the gallery, so only a URL pinned to the content may be cached as immutable
+    cache = "public, max-age=31536000, immutable" if v == digest[:VERSION_CHARS] else "public, no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if size:
+        return FileResponse(_thumbnail(image_id, size), media_type="image/webp", headers=headers)
+    return FileResponse(image_paths[image_id], headers=headers)
+
+
+@router.get("/tags")
+def list_tags():
+    """Tag facets: how many images carry each vocabulary tag. No model call."""
+    _ensure_loaded()
+    if not READY:
+        raise HTTPException(status_code=503, detail="CLIP search not ready (no images loaded)")
+    counts = (tag_probs >= TAG_MIN_PROB).sum(dim=0).tolist()
+    facets = sorted(zip(CLIP_TAGS, counts), key=lambda x: x[1], reverse=True)
+    return {"tags": [{"tag": tag, "count": count} for tag, count in facets]}
+
+
+@router.get("/tags/{tag}")
+def images_for_tag(tag: str, top_k: int = 24):
+    """Images carrying `tag`, most confident first, scored by their zero-shot probability. No model call."""
+    _ensure_loaded()
+    if not READY:
+        raise HTTPException(status_code=503, detail="CLIP search not ready (no images loaded)")
+    probs = tag_probs[:, _tag_columns([tag])[0]].float()
+    ids = torch.nonzero(probs >= TAG_MIN_PROB).squeeze(1)
+    top = probs[ids].topk(min(max(top_k, 0), len(ids)))
+    return {"tag": tag, "results": [_result(ids[i].item(), p) for p, i in zip(top.values.tolist(), top.indices.tolist())]}
 
 
 @router.post("/text-search")
@@ -118,20 +535,13 @@ def text_search(payload: dict):
     if not query:
         raise HTTPException(status_code=400, detail="query is required")
 
-    with torch.no_grad():
-        inputs = processor(text=[query], return_tensors="pt", padding=True)
-        text_features = model.get_text_features(**inputs)
-        text_features = text_features / text_features.norm(dim=-1, keepdim=True)
-
-    similarities = (image_embeddings @ text_features.T).squeeze(1)
-    top = similarities.topk(top_k)
+    mask = _tag_mask(payload.get("tags"))
+    query_vec = _query_embedding(query)
+    scores, ids = _top_matches(query_vec, top_k, _nprobe(payload), mask)
 
     return {
         "query": query,
-        "results": [
-            {"id": idx.item(), "filename": image_paths[idx.item()].name, "score": round(score.item(), 4)}
-            for score, idx in zip(top.values, top.indices)
-        ],
+        "results": [_result(idx.item(), score.item()) for score, idx in zip(scores, ids)],
     }
 
 
@@ -145,15 +555,10 @@ def image_search(payload: dict):
     if image_id is None or image_id < 0 or image_id >= len(image_paths):
         raise HTTPException(status_code=400, detail="valid image_id is required")
 
-    query_vec = image_embeddings[image_id : image_id + 1]
-    similarities = (image_embeddings @ query_vec.T).squeeze(1)
     # include one extra result since the query image will always match itself with score 1.0
-    top = similarities.topk(min(top_k + 1, len(image_paths)))
+    mask = _tag_mask(payload.get("tags"))
+    scores, ids = _top_matches(image_embeddings[image_id], top_k + 1, _nprobe(payload), mask)
 
-    results = [
-        {"id": idx.item(), "filename": image_paths[idx.item()].name, "score": round(score.item(), 4)}
-        for score, idx in zip(top.values, top.indices)
-        if idx.item() != image_id
-    ][:top_k]
+    results = [_result(idx.item(), score.item()) for score, idx in zip(scores, ids) if idx.item() != image_id][:top_k]
 
     return {"query_image_id": image_id, "results": results}
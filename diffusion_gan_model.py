@@ -20,6 +20,8 @@ import torch
 import torch.nn as nn
 from fastapi import APIRouter, HTTPException
 
+import inference_pool
+
 MODEL_DIR = Path(__file__).resolve().parent / "diffusion_gan_model_store"
 router = APIRouter(prefix="/api/diffusion-gan", tags=["diffusion-gan"])
 
@@ -126,6 +128,10 @@ except Exception as e:
 
 @torch.no_grad()
 def _generate_ddpm(n=6):
+    # 300 sequential UNet passes — the slowest call in this router, so it's
+    # the one handed to a worker process when INFERENCE_WORKERS is set.
+    if inference_pool.offloaded():
+        return inference_pool.run(__name__, "_generate_ddpm", n)
     x = torch.randn(n, 1, 28, 28)
     for t in reversed(range(T)):
         t_batch = torch.full((n,), t, dtype=torch.long)
@@ -178,7 +184,10 @@ def generate(payload: dict):
     n = min(int(payload.get("count", 6)), 8)
 
     if model_type == "ddpm":
-        images = _generate_ddpm(n)
+        try:
+            images = _generate_ddpm(n)
+        except inference_pool.InferenceError as e:
+            raise HTTPException(status_code=503, detail=str(e))
     elif model_type == "gan":
         images = _generate_gan(n)
     else:
@@ -0,0 +1,82 @@
+"""
+Precomputed answers for the routers' canned demo examples (fraud's example
+transactions, anomaly's NSL-KDD rows, sentiment's sample reviews).
+
+Those examples ship with the model artifacts and their predictions can only
+change when the artifacts do, yet every click on one re-ran preprocessing
+and a full forward pass. Each router now scores all of its examples once,
+in a single batched call, and serves clicks from a dict.
+
+The results are also written to EXAMPLE_CACHE_DIR under a name that
+includes a hash of the artifacts they came from, so a restart (or every
+serve.py worker) loads them instead of recomputing, and a retrained or
+re-exported model simply misses the cache and gets scored afresh.
+
+Importing a router only reads that file. A cold cache is scored on first
+use (the /examples request, normally), never at import: serve.py imports
+these routers in its pre-fork master, which must not run inference (see
+its docstring).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+EXAMPLE_CACHE_DIR = Path(os.getenv("EXAMPLE_CACHE_DIR", "data/example_cache"))
+
+
+def artifact_hash(paths: Iterable[Path]) -> str:
+    """SHA-256 over the given files' names and bytes, in order."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).name.encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ExampleResults:
+    """
+    The example results for `name`, keyed however the router likes (JSON
+    object keys, so strings). Read from disk at construction when a file
+    for the current artifact hash exists; otherwise get() runs compute() —
+    which should score every example in one batch — the first time it's
+    called, and saves the result for next time. A cache that can't be read
+    or written is never fatal; it just means computing on each start.
+    """
+
+    def __init__(self, name: str, artifacts: Iterable[Path], compute: Callable[[], dict]):
+        self.name = name
+        self.compute = compute
+        self.path = EXAMPLE_CACHE_DIR / f"{name}-{artifact_hash(artifacts)[:16]}.json"
+        self._lock = threading.Lock()
+        self._results: Optional[dict] = None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._results = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def get(self) -> dict:
+        if self._results is None:
+            with self._lock:
+                if self._results is None:
+                    self._results = self._compute_and_save()
+        return self._results
+
+    def _compute_and_save(self) -> dict:
+        results = self.compute()
+        try:
+            EXAMPLE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(results, f)
+            os.replace(tmp, self.path)
+            print(f"💾 Cached {len(results)} {self.name} example predictions")
+        except OSError as e:
+            print(f"⚠️ Could not save {self.name} example cache: {e}")
+        return results
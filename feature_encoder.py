@@ -0,0 +1,139 @@
+"""
+Compiled feature encoder shared by the tabular routers (churn, heart, house,
+anomaly).
+
+Every one of those routers used to turn a request into model input the same
+way: build a dict of encoded values, wrap it in a one-row pandas DataFrame
+and reindex() it against the training-time feature_names.json — paying
+DataFrame construction, column alignment and a dtype pass on every request
+to produce what is really just a fixed-length float vector.
+
+FeatureEncoder does the alignment work once, at import time: it maps every
+training column name to its position, groups one-hot columns by their
+source field, and pre-encodes a template row (all zeros, or a "typical"
+profile like house_model's). Encoding a request is then a copy of the
+template plus a handful of index writes straight into a NumPy row, or into
+a preallocated matrix for batches.
+
+One-hot semantics are the same manual scheme the routers already used
+(see churn_model.preprocess for why get_dummies can't be used on one row):
+"<field>_<value>" is set to 1 if that column exists, and a value with no
+column — the dropped reference category, or anything unseen — leaves every
+dummy for that field at 0.
+"""
+
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+import numpy as np
+
+
+def _default_dummy_name(field: str, value: Any) -> str:
+    return f"{field}_{value}"
+
+
+class FeatureEncoder:
+    def __init__(
+        self,
+        feature_names: list[str],
+        categorical: Iterable[str] = (),
+        dummy_name: Callable[[str, Any], str] = _default_dummy_name,
+        defaults: Optional[Mapping[str, Any]] = None,
+        dtype=np.float64,
+    ):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+        self.categorical = frozenset(categorical)
+        self.dummy_name = dummy_name
+        self.dtype = dtype
+        # field -> positions of all its one-hot columns, cleared before a
+        # new value is written (only matters when the template isn't zero).
+        self.dummy_block = {
+            field: np.array(
+                [i for name, i in self.index.items() if name.startswith(field + "_")], dtype=np.intp
+            )
+            for field in self.categorical
+        }
+        self.template = np.zeros(self.n_features, dtype=dtype)
+        if defaults:
+            self.encode_into(self.template, defaults)
+
+    def encode_into(self, out: np.ndarray, record: Mapping[str, Any]) -> np.ndarray:
+        """Write `record` over `out` (a 1-D row already holding the template,
+        or any earlier encoding). Keys that aren't training columns are
+        ignored, exactly like reindex() dropped them."""
+        index = self.index
+        for field, value in record.items():
+            if field in self.categorical:
+                out[self.dummy_block[field]] = 0
+                col = index.get(self.dummy_name(field, value))
+                if col is not None:
+                    out[col] = 1
+            else:
+                col = index.get(field)
+                if col is not None:
+                    out[col] = value
+        return out
+
+    def encode(self, record: Mapping[str, Any]) -> np.ndarray:
+        """One record -> a (1, n_features) matrix, ready for predict_proba."""
+        row = self.template.copy()
+        return self.encode_into(row, record)[np.newaxis, :]
+
+    def encode_batch(self, records: Iterable[Mapping[str, Any]], n: Optional[int] = None) -> np.ndarray:
+        """Many records -> an (n, n_features) matrix, filled in place. Pass
+        n when records is a generator to size the matrix up front."""
+        if n is None:
+            records = list(records)
+            n = len(records)
+        X = np.empty((n, self.n_features), dtype=self.dtype)
+        X[:] = self.template
+        filled = 0
+        for i, record in enumerate(records):
+            self.encode_into(X[i], record)
+            filled = i + 1
+        return X[:filled]
+
+    def encode_columns(self, columns: Mapping[str, Any], n: int) -> np.ndarray:
+        """Column-oriented batch encode for already-validated data: each value
+        is a length-n array (or a scalar broadcast to every row). One-hot
+        fields are filled per distinct value with a boolean mask, so the cost
+        scales with the number of categories, not rows."""
+        X = np.empty((n, self.n_features), dtype=self.dtype)
+        X[:] = self.template
+        for field, values in columns.items():
+            if field in self.categorical:
+                X[:, self.dummy_block[field]] = 0
+                values = np.asarray(values)
+                if values.ndim == 0:
+                    values = np.full(n, values.item(), dtype=object)
+                for value in np.unique(values):
+                    col = self.index.get(self.dummy_name(field, value))
+                    if col is not None:
+                        X[values == value, col] = 1
+            else:
+                col = self.index.get(field)
+                if col is not None:
+                    X[:, col] = values
+        return X
+
+    def bind(self, estimator):
+        """
+        Take over column-order checking from a fitted sklearn estimator.
+
+        Estimators fitted on a DataFrame remember feature_names_in_ and warn
+        on every call that passes a plain array instead. The check they'd do
+        per request is done here once instead: the stored names must match
+        this encoder's column order exactly (raises ValueError otherwise),
+        and then they're dropped so sklearn treats array input as expected.
+        """
+        target = estimator
+        while hasattr(target, "steps"):  # Pipeline — its first step holds the names
+            target = target.steps[0][1]
+        names = getattr(target, "feature_names_in_", None)
+        if names is None:
+            return estimator
+        if list(names) != self.feature_names:
+            raise ValueError(f"{type(target).__name__} was fitted on a different column order than feature_names.json")
+        del target.feature_names_in_
+        return estimator
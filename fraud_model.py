@@ -14,24 +14,73 @@ held-out test set (including a genuine false alarm and a genuine missed
 fraud, not just cherry-picked successes) rather than a free-form form.
 """
 
+import itertools
 import json
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Literal, Optional
 
 import joblib
-from fastapi import APIRouter, HTTPException
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, File, HTTPException, UploadFile
 from pydantic import BaseModel
 
+from batch_io import (
+    BatchParseError,
+    content_hash,
+    detect_format,
+    ndjson_line,
+    ndjson_response,
+    read_chunks,
+    spool_upload,
+)
+from example_cache import ExampleResults
+from xgb_scoring import XGBScorer
+
 MODEL_DIR = Path(__file__).resolve().parent / "fraud_model_store"
 
+# "numpy" | "inplace" | "sklearn" — see xgb_scoring.py
+XGB_ENGINE = os.getenv("FRAUD_XGB_ENGINE", "numpy")
+
 router = APIRouter(prefix="/api/fraud", tags=["fraud"])
 
 model = joblib.load(MODEL_DIR / "xgboost_model.pkl")
+amount_scaler = joblib.load(MODEL_DIR / "amount_scaler.pkl")
 feature_names: list[str] = json.load(open(MODEL_DIR / "feature_names.json"))
 metrics: dict = json.load(open(MODEL_DIR / "metrics.json"))
 examples: list[dict] = json.load(open(MODEL_DIR / "example_transactions.json"))
 
+scorer = XGBScorer(model, engine=XGB_ENGINE)
+
+
+def _score_examples() -> dict:
+    X = np.array([[e["features"][f] for f in feature_names] for e in examples], dtype=np.float32)
+    return {str(i): float(p) for i, p in enumerate(scorer.positive_proba(X))}
+
+
+# Every example's probability, scored once in one batch on first use — a
+# click on the demo is a dict lookup (see example_cache.py).
+example_probabilities = ExampleResults(
+    "fraud",
+    [MODEL_DIR / "xgboost_model.pkl", MODEL_DIR / "feature_names.json", MODEL_DIR / "example_transactions.json"],
+    _score_examples,
+)
+
 THRESHOLD = metrics["final_metrics"]["threshold"]
 
+# Raw transaction columns a bulk upload must carry (the ULB dataset's own
+# names), plus Hour — or Time, seconds since the first transaction, which
+# Hour was derived from at training time.
+PCA_COLS = [f for f in feature_names if f.startswith("V")]
+RAW_COLS = PCA_COLS + ["Amount"]
+# RobustScaler on one column is just (x - median) / IQR — applied directly
+# to the whole chunk's Amount column instead of via a one-column DataFrame.
+AMOUNT_CENTER = float(amount_scaler.center_[0])
+AMOUNT_SCALE = float(amount_scaler.scale_[0])
+
 
 class PredictRequest(BaseModel):
     example_index: int
@@ -57,6 +106,7 @@ def get_examples():
     """Real, held-out test-set transactions for the live demo — includes an
     actual false alarm and an actual missed fraud, not just cherry-picked
     correct predictions, since the features can't be hand-entered."""
+    example_probabilities.get()  # scores them now if the cache was cold, before the first click
     return [
         {"index": i, "label": e["label"], "amount": e["amount"], "true_label": e["true_label"]}
         for i, e in enumerate(examples)
@@ -69,11 +119,7 @@ def predict(payload: PredictRequest):
         raise HTTPException(status_code=400, detail="Invalid example_index")
 
     example = examples[payload.example_index]
-    try:
-        row = [[example["features"][f] for f in feature_names]]
-        prob = float(model.predict_proba(row)[:, 1][0])
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Prediction failed: {e}")
+    prob = example_probabilities.get()[str(payload.example_index)]
 
     prediction = "Fraud" if prob >= THRESHOLD else "Legitimate"
     actual = "Fraud" if example["true_label"] == 1 else "Legitimate"
@@ -87,3 +133,268 @@ def predict(payload: PredictRequest):
         threshold_used=THRESHOLD,
         correct=(prediction == actual),
     )
+
+
+def encode_frame(df: pd.DataFrame):
+    """
+    One uploaded chunk -> (X, valid): the model's feature matrix in
+    feature_names order, and which rows had every value present, numeric
+    and in range (Amount >= 0, Hour in [0, 24)). Invalid rows stay in X as
+    NaN and are simply never scored.
+    """
+    raw = df[RAW_COLS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    if "Hour" in df.columns:
+        hour = pd.to_numeric(df["Hour"], errors="coerce").to_numpy(dtype=np.float64)
+    else:
+        hour = np.floor(pd.to_numeric(df["Time"], errors="coerce").to_numpy(dtype=np.float64) / 3600) % 24
+    amount = raw[:, -1]
+    valid = np.isfinite(raw).all(axis=1) & np.isfinite(hour) & (amount >= 0) & (hour >= 0) & (hour < 24)
+
+    columns = {name: raw[:, i] for i, name in enumerate(PCA_COLS)}
+    columns["Amount_scaled"] = (amount - AMOUNT_CENTER) / AMOUNT_SCALE
+    columns["Hour"] = hour
+    X = np.column_stack([columns[f] for f in feature_names]).astype(np.float32)
+    return X, valid
+
+
+def _row_error(df: pd.DataFrame, i: int) -> str:
+    row = df.iloc[i]
+    for col in RAW_COLS + ["Hour" if "Hour" in df.columns else "Time"]:
+        value = pd.to_numeric(row[col], errors="coerce")
+        if pd.isna(value) or not np.isfinite(value):
+            return f"invalid {col}: {row[col]!r}"
+    return "Amount must be >= 0 and Hour in [0, 24)"
+
+
+def _missing_columns(df: pd.DataFrame, extra: tuple = ()) -> list[str]:
+    missing = [c for c in RAW_COLS + list(extra) if c not in df.columns]
+    if "Hour" not in df.columns and "Time" not in df.columns:
+        missing.append("Hour (or Time)")
+    return missing
+
+
+@router.post("/predict/batch")
+def predict_batch(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson", "parquet"]] = None,
+    id_column: str = "id",
+    label_column: str = "Class",
+):
+    """
+    Bulk-score real transactions: a CSV, NDJSON or Parquet upload with
+    V1-V28, Amount and Hour (or Time) per row, validated against
+    feature_names.json. Chunks of BATCH_CHUNK_ROWS rows are encoded and
+    scored in one vectorized call each, so memory stays bounded by the chunk
+    size, not the file.
+
+    Streams NDJSON back: per row, its fraud probability and label at the
+    case study's THRESHOLD (or why it couldn't be scored), then a summary
+    line with counts — and, when the upload carries a label column (Class,
+    as in the original dataset), the confusion matrix, precision and recall.
+    """
+    fmt = detect_format(file, format, allowed=("csv", "ndjson", "parquet"))
+    spooled = spool_upload(file)
+
+    # Schema problems in the first chunk are a 400 before streaming starts,
+    # as in anomaly's predict_batch; only later chunks report them in-stream.
+    chunks = read_chunks(spooled, fmt)
+    try:
+        first = next(chunks, None)
+    except BatchParseError as e:
+        spooled.close()
+        raise HTTPException(status_code=400, detail=f"Could not parse upload: {e}")
+    missing = _missing_columns(first) if first is not None else []
+    if missing:
+        chunks.close()
+        spooled.close()
+        raise HTTPException(status_code=400, detail=f"Missing required column(s): {', '.join(missing)}")
+
+    def lines():
+        total = scored = flagged = 0
+        confusion = {"tp": 0, "fp": 0, "fn": 0, "tn": 0}
+        labelled = False
+        for chunk in itertools.chain([first] if first is not None else [], chunks):
+            missing = _missing_columns(chunk)
+            if missing:
+                yield ndjson_line({"error": f"Missing required column(s): {', '.join(missing)}"})
+                return
+
+            X, valid = encode_frame(chunk)
+            probs = np.full(len(chunk), np.nan)
+            if valid.any():
+                probs[valid] = scorer.positive_proba(X[valid])
+            is_fraud = probs >= THRESHOLD
+            ids = chunk[id_column].astype(str).to_numpy() if id_column in chunk.columns else None
+            labels = None
+            if label_column in chunk.columns:
+                labelled = True
+                labels = pd.to_numeric(chunk[label_column], errors="coerce").to_numpy()
+            row_numbers = chunk.index.to_numpy()
+
+            for i in range(len(chunk)):
+                line = {"row": int(row_numbers[i])}
+                if ids is not None:
+                    line[id_column] = ids[i]
+                if not valid[i]:
+                    line["error"] = _row_error(chunk, i)
+                    yield ndjson_line(line)
+                    continue
+                line["fraud_probability"] = round(float(probs[i]), 4)
+                line["prediction"] = "Fraud" if is_fraud[i] else "Legitimate"
+                if labels is not None and labels[i] in (0, 1):
+                    line["true_label"] = int(labels[i])
+                yield ndjson_line(line)
+
+            total += len(chunk)
+            scored += int(valid.sum())
+            flagged += int((is_fraud & valid).sum())
+            if labels is not None:
+                known = valid & np.isin(labels, (0, 1))
+                actual = labels == 1
+                confusion["tp"] += int((known & is_fraud & actual).sum())
+                confusion["fp"] += int((known & is_fraud & ~actual).sum())
+                confusion["fn"] += int((known & ~is_fraud & actual).sum())
+                confusion["tn"] += int((known & ~is_fraud & ~actual).sum())
+
+        summary = {
+            "rows": total,
+            "scored": scored,
+            "invalid": total - scored,
+            "flagged_fraud": flagged,
+            "alert_rate": round(flagged / scored, 6) if scored else None,
+            "threshold_used": THRESHOLD,
+        }
+        if labelled:
+            tp, fp, fn = confusion["tp"], confusion["fp"], confusion["fn"]
+            summary["confusion_matrix"] = confusion
+            summary["precision"] = round(tp / (tp + fp), 4) if tp + fp else None
+            summary["recall"] = round(tp / (tp + fn), 4) if tp + fn else None
+        yield ndjson_line({"summary": summary})
+
+    return ndjson_response(lines(), spooled)
+
+
+# ---------------------------------------------------------------------------
+# Threshold sweep — the full operating-point curve for a labelled batch
+# ---------------------------------------------------------------------------
+CURVE_CACHE_SIZE = 32
+_curve_cache: "OrderedDict[str, dict]" = OrderedDict()
+_curve_cache_lock = threading.Lock()  # threadpool handlers share it, see churn's _explanation_lock
+
+
+def operating_curve(probs: np.ndarray, labels: np.ndarray) -> dict:
+    """
+    Precision, recall, F1 and alert rate at every distinct score as the
+    threshold, from one sort and two cumulative sums: with rows sorted by
+    descending score, "flag everything scoring >= t" is a prefix, so its
+    true/false positive counts are just running totals. O(n log n) for the
+    whole curve instead of a full confusion-matrix pass per threshold.
+    """
+    order = np.argsort(-probs, kind="stable")
+    scores, actual = probs[order], labels[order].astype(bool)
+    tp = np.cumsum(actual)
+    fp = np.cumsum(~actual)
+    # Tied scores share a threshold — keep the last row of each run of ties.
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp, fp, thresholds = tp[last], fp[last], scores[last]
+
+    positives = int(actual.sum())
+    flagged = tp + fp
+    precision = tp / flagged
+    recall = tp / positives if positives else np.zeros_like(precision)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    best = int(np.argmax(f1))
+    current = int(np.searchsorted(-thresholds, -THRESHOLD, side="right")) - 1
+
+    def point(i):
+        if i < 0:  # THRESHOLD is above every score: nothing flagged
+            return {"threshold": THRESHOLD, "precision": None, "recall": 0.0, "f1": 0.0, "alert_rate": 0.0}
+        return {
+            "threshold": round(float(thresholds[i]), 6),
+            "precision": round(float(precision[i]), 4),
+            "recall": round(float(recall[i]), 4),
+            "f1": round(float(f1[i]), 4),
+            "alert_rate": round(float(flagged[i] / len(scores)), 6),
+        }
+
+    return {
+        "rows": len(scores),
+        "positives": positives,
+        "curve": {
+            "threshold": np.round(thresholds, 6).tolist(),
+            "precision": np.round(precision, 4).tolist(),
+            "recall": np.round(recall, 4).tolist(),
+            "f1": np.round(f1, 4).tolist(),
+            "alert_rate": np.round(flagged / len(scores), 6).tolist(),
+        },
+        "best_f1": point(best),
+        "at_current_threshold": {**point(current), "threshold": THRESHOLD},
+    }
+
+
+def _score_labelled_upload(fileobj, fmt: str, label_column: str):
+    probs, labels, skipped = [], [], 0
+    for chunk in read_chunks(fileobj, fmt):
+        missing = _missing_columns(chunk, extra=(label_column,))
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing required column(s): {', '.join(missing)}")
+        X, valid = encode_frame(chunk)
+        y = pd.to_numeric(chunk[label_column], errors="coerce").to_numpy()
+        keep = valid & np.isin(y, (0, 1))
+        skipped += int((~keep).sum())
+        if keep.any():
+            probs.append(scorer.positive_proba(X[keep]))
+            labels.append(y[keep])
+    if not probs:
+        raise HTTPException(status_code=400, detail="No valid labelled rows in the upload")
+    return np.concatenate(probs).astype(np.float64), np.concatenate(labels), skipped
+
+
+@router.post("/threshold-curve")
+def threshold_curve(
+    file: Optional[UploadFile] = File(None),
+    format: Optional[Literal["csv", "ndjson", "parquet"]] = None,
+    label_column: str = "Class",
+):
+    """
+    Operating-point curve for a scored, labelled batch: upload transactions
+    in the /predict/batch format plus a 0/1 label column, or send no file
+    to use the shipped example transactions. Cached by a hash of the
+    upload's bytes, so re-exploring the same batch is free.
+    """
+    if file is None:
+        key = "examples"
+    else:
+        fmt = detect_format(file, format, allowed=("csv", "ndjson", "parquet"))
+        spooled = spool_upload(file)
+        key = f"{content_hash(spooled)}:{label_column}"
+
+    with _curve_cache_lock:
+        cached = _curve_cache.get(key)
+        if cached is not None:
+            _curve_cache.move_to_end(key)
+    if cached is not None:
+        if file is not None:
+            spooled.close()
+        return cached
+
+    if file is None:
+        by_index = example_probabilities.get()
+        probs = np.array([by_index[str(i)] for i in range(len(examples))])
+        labels = np.array([e["true_label"] for e in examples])
+        skipped = 0
+    else:
+        try:
+            probs, labels, skipped = _score_labelled_upload(spooled, fmt, label_column)
+        except BatchParseError as e:
+            raise HTTPException(status_code=400, detail=f"Could not parse upload: {e}")
+        finally:
+            spooled.close()
+
+    result = {**operating_curve(probs, labels), "skipped_rows": skipped}
+    with _curve_cache_lock:
+        _curve_cache[key] = result
+        if len(_curve_cache) > CURVE_CACHE_SIZE:
+            _curve_cache.popitem(last=False)
+    return result
@@ -167,8 +167,10 @@ export default function ClipSearchDemo({ theme }) {
                 title="Click to find similar images"
               >
                 <img
-                  src={`${API_BASE}/image/${item.id}`}
+                  src={`${API_BASE}/image/${item.id}?size=256&v=${item.version}`}
+                  srcSet={`${API_BASE}/image/${item.id}?size=256&v=${item.version} 1x, ${API_BASE}/image/${item.id}?size=512&v=${item.version} 2x`}
                   alt={item.filename}
+                  loading="lazy"
                   className="w-full h-full object-cover group-hover:scale-105 transition-transform"
                 />
                 <div className="absolute bottom-0 left-0 right-0 bg-black/60 text-white text-[10px] px-2 py-1 font-medium">
@@ -18,6 +18,8 @@ import torch.nn as nn
 from fastapi import APIRouter, HTTPException
 from transformers import GPT2LMHeadModel, GPT2Tokenizer
 
+import inference_pool
+
 MODEL_DIR = Path(__file__).resolve().parent / "gpt2_lora_model_store"
 LORA_PATH = MODEL_DIR / "best_gpt2_lora.pt"
 
@@ -71,6 +73,15 @@ def _ensure_loaded():
         return
     LOAD_ATTEMPTED = True
 
+    if inference_pool.offloaded():
+        # GPT-2 lives in the inference workers instead — just ask one
+        # whether it loaded.
+        try:
+            READY = inference_pool.run(__name__, "_worker_status")
+        except inference_pool.InferenceError as e:
+            print(f"gpt2_lora: inference worker failed to load model ({e}) — live demo will report unavailable")
+        return
+
     try:
         tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
         tokenizer.pad_token = tokenizer.eos_token
@@ -88,8 +99,18 @@ def _ensure_loaded():
         print(f"gpt2_lora: failed to load model ({e}) — live demo will report unavailable")
 
 
+def _worker_status() -> bool:
+    _ensure_loaded()
+    return READY
+
+
 @torch.no_grad()
 def _generate(prompt: str, max_new_tokens: int = 40) -> str:
+    if inference_pool.offloaded():
+        return inference_pool.run(__name__, "_generate", prompt, max_new_tokens)
+    _ensure_loaded()  # no-op in the API process; loads on the first job in a fresh worker
+    if not READY:
+        raise RuntimeError("GPT-2 LoRA model not loaded")
     input_ids = tokenizer.encode(prompt, return_tensors="pt")
     output_ids = model.generate(
         input_ids,
@@ -116,5 +137,8 @@ def generate(payload: dict):
         raise HTTPException(status_code=400, detail="prompt is required")
     if len(prompt) > 200:
         raise HTTPException(status_code=400, detail="prompt too long (max 200 characters)")
-    text = _generate(prompt)
+    try:
+        text = _generate(prompt)
+    except inference_pool.InferenceError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     return {"text": text}
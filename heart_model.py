@@ -11,13 +11,15 @@ it "won". Random Forest is also served here so visitors can compare both.
 
 import json
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 
 import joblib
-import pandas as pd
+import numpy as np
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
+from feature_encoder import FeatureEncoder
+
 MODEL_DIR = Path(__file__).resolve().parent / "heart_model_store"
 
 router = APIRouter(prefix="/api/heart", tags=["heart"])
@@ -50,6 +52,16 @@ MODEL_REGISTRY = {
 CATEGORICAL_NOMINAL = ["chest_pain_type", "resting_ecg", "ST_slope"]
 ModelKey = Literal["logistic_regression", "random_forest"]
 
+# Dummy columns were named from float-typed categories at training time
+# ("chest_pain_type_4.0"), hence the float() in the column name.
+encoder = FeatureEncoder(
+    feature_names,
+    categorical=CATEGORICAL_NOMINAL,
+    dummy_name=lambda col, value: f"{col}_{float(value)}",
+)
+encoder.bind(lr_pipeline)
+encoder.bind(rf_model)
+
 
 class PatientInput(BaseModel):
     model: ModelKey = "logistic_regression"
@@ -73,26 +85,45 @@ class PredictionResponse(BaseModel):
     threshold_used: float = 0.5
 
 
-def preprocess(payload: PatientInput) -> pd.DataFrame:
-    row = payload.model_dump(exclude={"model"})
-    encoded = {
-        "age": row["age"], "sex": row["sex"], "resting_bp_s": row["resting_bp_s"],
-        "cholesterol": row["cholesterol"], "fasting_blood_sugar": row["fasting_blood_sugar"],
-        "max_heart_rate": row["max_heart_rate"], "exercise_angina": row["exercise_angina"],
-        "oldpeak": row["oldpeak"],
-    }
+SweepFeature = Literal["age", "resting_bp_s", "cholesterol", "max_heart_rate", "oldpeak"]
+MAX_SWEEP_POINTS = 10_000
+
+
+class SweepAxis(BaseModel):
+    feature: SweepFeature
+    start: float
+    stop: float
+    steps: int = Field(50, ge=2, le=200)
+
+
+class SweepRequest(BaseModel):
+    base: PatientInput = PatientInput()
+    x: SweepAxis
+    y: Optional[SweepAxis] = None  # set for a 2-D heatmap instead of a curve
+    models: list[ModelKey] = ["logistic_regression", "random_forest"]
+
+
+def preprocess(payload: PatientInput) -> np.ndarray:
     # Same manual one-hot approach as churn's preprocess() — get_dummies on a
     # single row breaks with drop_first (see churn_model.py for the full
     # explanation), so dummy columns are set explicitly against the known
-    # training-time feature set instead.
-    for col in CATEGORICAL_NOMINAL:
-        dummy_col = f"{col}_{float(row[col])}"
-        if dummy_col in feature_names:
-            encoded[dummy_col] = 1
+    # training-time feature set instead, by the shared FeatureEncoder.
+    return encoder.encode(payload.model_dump(exclude={"model"}))
+
 
-    df = pd.DataFrame([encoded])
-    df = df.reindex(columns=feature_names, fill_value=0)
-    return df
+def sweep_values(axis: SweepAxis) -> np.ndarray:
+    """The grid points for one axis, checked against the same bounds
+    PatientInput enforces; integer fields are rounded and de-duplicated."""
+    field = PatientInput.model_fields[axis.feature]
+    lo = next((m.ge for m in field.metadata if hasattr(m, "ge")), None)
+    hi = next((m.le for m in field.metadata if hasattr(m, "le")), None)
+    for bound in (axis.start, axis.stop):
+        if (lo is not None and bound < lo) or (hi is not None and bound > hi):
+            raise HTTPException(status_code=400, detail=f"{axis.feature} range must lie within [{lo}, {hi}]")
+    values = np.linspace(axis.start, axis.stop, axis.steps)
+    if field.annotation is int:
+        values = np.unique(np.round(values)).astype(int)
+    return values
 
 
 @router.get("/models")
@@ -119,3 +150,45 @@ def predict(payload: PatientInput):
         disease_probability=round(prob, 4),
         prediction_at_threshold="Yes" if prob >= 0.5 else "No",
     )
+
+
+@router.post("/sweep")
+def sweep(payload: SweepRequest):
+    """
+    What-if curves (one swept feature) or heatmaps (two), holding every other
+    field at payload.base. The whole grid is encoded as one matrix and each
+    model scores it with a single predict_proba call, so a 100-point curve
+    costs one model invocation instead of 100 /predict round trips.
+    """
+    if payload.y is not None and payload.y.feature == payload.x.feature:
+        raise HTTPException(status_code=400, detail="x and y must sweep different features")
+    xs = sweep_values(payload.x)
+    ys = sweep_values(payload.y) if payload.y is not None else None
+    n = len(xs) * (len(ys) if ys is not None else 1)
+    if n > MAX_SWEEP_POINTS:
+        raise HTTPException(status_code=400, detail=f"Grid too large ({n} points, max {MAX_SWEEP_POINTS})")
+
+    # Row-major over (y, x): row i*len(xs) + j is the point (ys[i], xs[j]).
+    columns = payload.base.model_dump(exclude={"model"})
+    if ys is None:
+        columns[payload.x.feature] = xs
+    else:
+        columns[payload.x.feature] = np.tile(xs, len(ys))
+        columns[payload.y.feature] = np.repeat(ys, len(xs))
+
+    result = {"x": {"feature": payload.x.feature, "values": xs.tolist()}}
+    if ys is not None:
+        result["y"] = {"feature": payload.y.feature, "values": ys.tolist()}
+    result["threshold_used"] = 0.5
+    result["models"] = {}
+    try:
+        X = encoder.encode_columns(columns, n)
+        for key in dict.fromkeys(payload.models):
+            config = MODEL_REGISTRY[key]
+            probs = np.round(config["estimator"].predict_proba(X)[:, 1], 4)
+            if ys is not None:
+                probs = probs.reshape(len(ys), len(xs))  # heatmap[i][j] = P(ys[i], xs[j])
+            result["models"][key] = {"label": config["label"], "disease_probability": probs.tolist()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Sweep failed: {e}")
+    return result
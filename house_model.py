@@ -15,13 +15,15 @@ else from a "typical house" profile (median/mode across the training set)
 
 import json
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 
 import joblib
 import numpy as np
-import pandas as pd
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
+from scipy import sparse
+
+from feature_encoder import FeatureEncoder
 
 MODEL_DIR = Path(__file__).resolve().parent / "house_model_store"
 
@@ -44,6 +46,16 @@ for f in feature_names:
         if f.startswith(col + '_'):
             NOMINAL_COLS_WITH_DUMMIES.add(col)
 
+# The "typical house" is encoded once, into the encoder's template row —
+# each request only overwrites the dozen fields the form actually exposes.
+# Every string-valued profile field is a one-hot source column.
+encoder = FeatureEncoder(
+    feature_names,
+    categorical=[k for k, v in default_profile.items() if isinstance(v, str)],
+    defaults=default_profile,
+)
+encoder.bind(model)
+
 
 class HouseInput(BaseModel):
     gr_liv_area: int = Field(1500, ge=300, le=6000, description="Above-ground living area (sq ft)")
@@ -67,6 +79,92 @@ class PredictionResponse(BaseModel):
     mae_dollars: float
 
 
+# HouseInput field -> training column it overrides in the typical-house row.
+FIELD_COLUMNS = {
+    "gr_liv_area": "Gr Liv Area",
+    "overall_qual": "Overall Qual",
+    "overall_cond": "Overall Cond",
+    "year_built": "Year Built",
+    "total_bsmt_sf": "Total Bsmt SF",
+    "garage_cars": "Garage Cars",
+    "full_bath": "Full Bath",
+    "bedroom_abvgr": "Bedroom AbvGr",
+    "lot_area": "Lot Area",
+    "neighborhood": "Neighborhood",
+    "kitchen_qual": "Kitchen Qual",
+    "exter_qual": "Exter Qual",
+}
+
+CurveFeature = Literal[
+    "gr_liv_area", "overall_qual", "overall_cond", "year_built", "total_bsmt_sf",
+    "garage_cars", "full_bath", "bedroom_abvgr", "lot_area",
+]
+MAX_CURVE_POINTS = 20_000
+
+
+class PriceCurveRequest(BaseModel):
+    base: HouseInput = HouseInput()
+    feature: CurveFeature = "gr_liv_area"
+    start: Optional[int] = None  # defaults to the field's own bounds
+    stop: Optional[int] = None
+    steps: int = Field(50, ge=2, le=200)
+    neighborhoods: Optional[list[str]] = None  # None = every neighborhood
+
+
+class LinearEngine:
+    """
+    The Lasso pipeline, solved in closed form. StandardScaler + Lasso is one
+    affine map of the encoded row — log_price = intercept + coef . x once the
+    scaler's mean/scale are folded into the coefficients — and the request
+    only ever changes a dozen columns of the typical-house row. So the
+    typical house's log price is computed once, and a request costs a dot
+    product over just the columns it changed: no 216-wide row, no scaler
+    pass, no model.predict. Batches stack those changes into one sparse
+    matrix and score with a single sparse dot product.
+    """
+
+    def __init__(self, pipeline, encoder: FeatureEncoder):
+        scaler, lasso = pipeline.steps[0][1], pipeline.steps[-1][1]
+        self.coef = lasso.coef_ / scaler.scale_
+        self.intercept = float(lasso.intercept_ - self.coef @ scaler.mean_)
+        self.encoder = encoder
+        self.baseline = self.intercept + float(self.coef @ encoder.template)
+
+    def _changes(self, overrides: dict):
+        """(columns, deltas) that turn the template row into this request's row."""
+        enc = self.encoder
+        cols, deltas = [], []
+        for field, value in overrides.items():
+            if field in enc.categorical:
+                block = enc.dummy_block[field]
+                target = np.zeros(len(block))
+                col = enc.index.get(enc.dummy_name(field, value))
+                if col is not None:
+                    target[np.searchsorted(block, col)] = 1
+                cols.extend(block)
+                deltas.extend(target - enc.template[block])
+            else:
+                col = enc.index.get(field)
+                if col is not None:
+                    cols.append(col)
+                    deltas.append(value - enc.template[col])
+        return cols, deltas
+
+    def log_price(self, overrides: dict) -> float:
+        cols, deltas = self._changes(overrides)
+        return self.baseline + float(self.coef[cols] @ np.asarray(deltas))
+
+    def log_price_batch(self, rows: list[dict]) -> np.ndarray:
+        indptr, indices, data = [0], [], []
+        for overrides in rows:
+            cols, deltas = self._changes(overrides)
+            indices.extend(cols)
+            data.extend(deltas)
+            indptr.append(len(indices))
+        changes = sparse.csr_matrix((data, indices, indptr), shape=(len(rows), self.encoder.n_features))
+        return self.baseline + changes @ self.coef
+
+
 @router.get("/metrics")
 def get_metrics():
     return metrics
@@ -78,48 +176,27 @@ def get_neighborhoods():
     return sorted({f.split('Neighborhood_')[1] for f in feature_names if f.startswith('Neighborhood_')} | {"NAmes"})
 
 
-def preprocess(payload: HouseInput) -> pd.DataFrame:
-    row = dict(default_profile)  # start from the "typical house" baseline
-
-    row['Gr Liv Area'] = payload.gr_liv_area
-    row['Overall Qual'] = payload.overall_qual
-    row['Overall Cond'] = payload.overall_cond
-    row['Year Built'] = payload.year_built
-    row['Total Bsmt SF'] = payload.total_bsmt_sf
-    row['Garage Cars'] = payload.garage_cars
-    row['Full Bath'] = payload.full_bath
-    row['Bedroom AbvGr'] = payload.bedroom_abvgr
-    row['Lot Area'] = payload.lot_area
-    row['Neighborhood'] = payload.neighborhood
+def overrides(payload: HouseInput) -> dict:
+    """The form's fields as training-column overrides on top of the "typical
+    house" baseline in encoder.template."""
+    row = {column: getattr(payload, field) for field, column in FIELD_COLUMNS.items()}
     row['Kitchen Qual'] = ORDINAL_MAPS['Kitchen Qual'][payload.kitchen_qual]
     row['Exter Qual'] = ORDINAL_MAPS['Exter Qual'][payload.exter_qual]
+    return row
 
+
+def preprocess(payload: HouseInput) -> np.ndarray:
     # Manual one-hot against the known training-time feature set — same
     # single-row drop_first pitfall as every other project in this series.
-    encoded = {}
-    for key, value in row.items():
-        if isinstance(value, str):
-            dummy_col = f"{key}_{value}"
-            if dummy_col in feature_names:
-                encoded[dummy_col] = 1
-            # else: this value is the reference/dropped category — every
-            # dummy for this field correctly stays 0 via reindex below.
-        else:
-            encoded[key] = value
-
-    df = pd.DataFrame([encoded])
-    df = df.reindex(columns=feature_names, fill_value=0)
-    return df
+    # A reference/dropped category (e.g. NAmes) has no column of its own, so
+    # every dummy for that field correctly ends up 0.
+    return encoder.encode(overrides(payload))
 
 
-@router.post("/predict", response_model=PredictionResponse)
-def predict(payload: HouseInput):
-    try:
-        X = preprocess(payload)
-        log_price = float(model.predict(X)[0])
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Prediction failed: {e}")
+engine = LinearEngine(model, encoder)
+
 
+def price_response(log_price: float) -> PredictionResponse:
     price = float(np.expm1(log_price))
     mae_dollars = metrics["final_metrics"]["mae_dollars"]
 
@@ -129,3 +206,68 @@ def predict(payload: HouseInput):
         price_range_high=round(price + mae_dollars, 2),
         mae_dollars=round(mae_dollars, 2),
     )
+
+
+@router.post("/predict", response_model=PredictionResponse)
+def predict(payload: HouseInput):
+    try:
+        log_price = engine.log_price(overrides(payload))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Prediction failed: {e}")
+    return price_response(log_price)
+
+
+@router.post("/predict/batch", response_model=list[PredictionResponse])
+def predict_batch(payloads: list[HouseInput]):
+    if len(payloads) > MAX_CURVE_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CURVE_POINTS} houses per batch")
+    try:
+        log_prices = engine.log_price_batch([overrides(p) for p in payloads])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Prediction failed: {e}")
+    return [price_response(float(lp)) for lp in log_prices]
+
+
+@router.post("/price-curve")
+def price_curve(payload: PriceCurveRequest):
+    """
+    Predicted price as one feature varies (living area by default), one
+    curve per neighborhood, everything else held at payload.base — the whole
+    grid scored with a single sparse dot product.
+    """
+    field = HouseInput.model_fields[payload.feature]
+    lo = next((m.ge for m in field.metadata if hasattr(m, "ge")), None)
+    hi = next((m.le for m in field.metadata if hasattr(m, "le")), None)
+    start = payload.start if payload.start is not None else lo
+    stop = payload.stop if payload.stop is not None else hi
+    for bound in (start, stop):
+        if (lo is not None and bound < lo) or (hi is not None and bound > hi):
+            raise HTTPException(status_code=400, detail=f"{payload.feature} range must lie within [{lo}, {hi}]")
+    if start > stop:
+        raise HTTPException(status_code=400, detail="start must not be greater than stop")
+    values = np.unique(np.round(np.linspace(start, stop, payload.steps))).astype(int)
+    known = get_neighborhoods()
+    neighborhoods = payload.neighborhoods or known
+    unknown = [n for n in neighborhoods if n not in known]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown neighborhood(s): {', '.join(unknown)}")
+    if len(values) * len(neighborhoods) > MAX_CURVE_POINTS:
+        raise HTTPException(status_code=400, detail=f"Grid too large (max {MAX_CURVE_POINTS} points)")
+
+    base = overrides(payload.base)
+    column = FIELD_COLUMNS[payload.feature]
+    rows = [
+        {**base, "Neighborhood": neighborhood, column: int(value)}
+        for neighborhood in neighborhoods
+        for value in values
+    ]
+    try:
+        prices = np.expm1(engine.log_price_batch(rows)).reshape(len(neighborhoods), len(values))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Prediction failed: {e}")
+    return {
+        "feature": payload.feature,
+        "values": values.tolist(),
+        "curves": {n: np.round(p, 2).tolist() for n, p in zip(neighborhoods, prices)},
+        "mae_dollars": round(metrics["final_metrics"]["mae_dollars"], 2),
+    }
@@ -0,0 +1,316 @@
+"""
+Out-of-process inference pool for the heavy torch demos — DDPM sampling,
+Mini-LLaVA captioning, GPT-2 LoRA generation and the RAG cross-encoder.
+
+Off by default: every router runs its model in-process exactly as before.
+Setting INFERENCE_WORKERS=N (N >= 1) moves those calls into N separate
+worker processes instead, so a 300-step DDPM sample or a 25-token caption
+holds a worker's GIL rather than the API process's — chat streams on the
+same uvicorn worker stop stalling behind a long torch call, and the heavy
+demos get cores of their own.
+
+The protocol is deliberately small: a job is (job_id, module, function,
+args) put on that worker's own queue, and the worker imports the router
+module itself and calls the function there (so each router's lazy
+_ensure_loaded still decides what gets loaded, just in the worker). Any
+NumPy array or torch tensor in the args or the result travels through a
+SharedMemory block instead of being pickled through the pipe. A worker that
+dies mid-job (OOM, segfault in a native kernel) or overruns
+INFERENCE_TIMEOUT is restarted, and only the jobs it was holding fail.
+
+Workers use the "spawn" start method so they never inherit the server's
+threads, event loop or open sockets. Run the app the usual way
+(`uvicorn main:app`), not `python main.py` — spawn re-imports the launching
+script in every worker.
+"""
+
+import atexit
+import importlib
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "180"))
+# Torch intra-op threads per worker. Left to torch's default (every core) N
+# workers would oversubscribe the CPU N times over.
+INFERENCE_WORKER_THREADS = int(
+    os.getenv("INFERENCE_WORKER_THREADS", str(max(1, (os.cpu_count() or 1) // max(1, INFERENCE_WORKERS))))
+)
+
+ENABLED = INFERENCE_WORKERS > 0
+IN_WORKER = False  # flipped inside worker processes, so routers run their models locally there
+
+
+class InferenceError(RuntimeError):
+    """A pooled job raised, lost its worker, or ran past INFERENCE_TIMEOUT."""
+
+
+def offloaded() -> bool:
+    """True when heavy calls made from this process should go to the pool."""
+    return ENABLED and not IN_WORKER
+
+
+# ---------------------------------------------------------------------------
+# Shared-memory transport for arrays/tensors
+# ---------------------------------------------------------------------------
+class _SharedArray:
+    """Picklable handle to an array parked in a SharedMemory block."""
+
+    __slots__ = ("name", "shape", "dtype", "is_torch")
+
+    def __init__(self, name, shape, dtype, is_torch):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self.is_torch = is_torch
+
+    def __getstate__(self):
+        return (self.name, self.shape, self.dtype, self.is_torch)
+
+    def __setstate__(self, state):
+        self.name, self.shape, self.dtype, self.is_torch = state
+
+
+def _pack(obj, owned: list):
+    """Replace every array/tensor inside obj with a _SharedArray handle. The
+    SharedMemory blocks created are appended to `owned` so the caller can
+    close them once the other side has the handle."""
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_pack(o, owned) for o in obj)
+    if isinstance(obj, dict):
+        return {k: _pack(v, owned) for k, v in obj.items()}
+
+    is_torch = type(obj).__module__.startswith("torch") and hasattr(obj, "detach")
+    if is_torch:
+        arr = obj.detach().cpu().contiguous().numpy()
+    elif isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj)
+    else:
+        return obj
+    if arr.nbytes == 0 or arr.dtype.hasobject:
+        return obj  # SharedMemory can't be zero-sized; object arrays aren't flat bytes
+
+    shm = shared_memory.SharedMemory(create=True, size=arr.nbytes)
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    owned.append(shm)
+    return _SharedArray(shm.name, arr.shape, arr.dtype.str, is_torch)
+
+
+def _unpack(obj, unlink: bool = False):
+    """Inverse of _pack. With unlink=True the blocks are freed once copied
+    out — used for results, whose blocks the worker created and handed over."""
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_unpack(o, unlink) for o in obj)
+    if isinstance(obj, dict):
+        return {k: _unpack(v, unlink) for k, v in obj.items()}
+    if not isinstance(obj, _SharedArray):
+        return obj
+
+    shm = shared_memory.SharedMemory(name=obj.name)
+    try:
+        arr = np.ndarray(obj.shape, dtype=np.dtype(obj.dtype), buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+    if obj.is_torch:
+        import torch
+
+        return torch.from_numpy(arr)
+    return arr
+
+
+def _release(owned: list):
+    for shm in owned:
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+def _worker_main(jobs, results, threads: int):
+    global IN_WORKER
+    IN_WORKER = True
+    if threads:
+        import torch
+
+        torch.set_num_threads(threads)
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job_id, module_name, fn_name, packed_args = job
+        owned = []
+        try:
+            fn = getattr(importlib.import_module(module_name), fn_name)
+            value = fn(*_unpack(packed_args))
+            results.send((job_id, True, _pack(value, owned)))
+        except Exception as e:
+            _release(owned)
+            results.send((job_id, False, f"{type(e).__name__}: {e}"))
+        finally:
+            # The API process owns (and unlinks) result blocks from here on.
+            for shm in owned:
+                shm.close()
+
+
+# ---------------------------------------------------------------------------
+# Pool (API process side)
+# ---------------------------------------------------------------------------
+class InferencePool:
+    def __init__(self, size: int):
+        self._ctx = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._procs = [None] * size
+        self._jobs = [None] * size
+        self._results = [None] * size
+        # per worker: job_id -> (future, input blocks, deadline)
+        self._inflight = [{} for _ in range(size)]
+        self._closed = False
+        for i in range(size):
+            self._start_worker(i)
+        self._collector = threading.Thread(target=self._collect, name="inference-pool", daemon=True)
+        self._collector.start()
+        print(f"🧵 Inference pool started ({size} worker(s), {INFERENCE_WORKER_THREADS} torch thread(s) each)")
+
+    def _start_worker(self, i: int):
+        jobs = self._ctx.Queue()
+        reader, writer = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(jobs, writer, INFERENCE_WORKER_THREADS),
+            name=f"inference-worker-{i}",
+            daemon=True,
+        )
+        proc.start()
+        writer.close()
+        self._procs[i], self._jobs[i], self._results[i] = proc, jobs, reader
+
+    def submit(self, module: str, fn: str, *args) -> Future:
+        future = Future()
+        owned = []
+        packed = _pack(args, owned)
+        with self._lock:
+            if self._closed:
+                _release(owned)
+                raise InferenceError("inference pool is shut down")
+            i = min(range(len(self._procs)), key=lambda w: len(self._inflight[w]))
+            job_id = next(self._ids)
+            self._inflight[i][job_id] = (future, owned, time.monotonic() + INFERENCE_TIMEOUT)
+            self._jobs[i].put((job_id, module, fn, packed))
+        return future
+
+    def _collect(self):
+        while not self._closed:
+            with self._lock:
+                readers = {r: i for i, r in enumerate(self._results)}
+                sentinels = [p.sentinel for p in self._procs]
+            for ready in wait(list(readers) + sentinels, timeout=1.0):
+                if ready in readers:
+                    try:
+                        job_id, ok, payload = ready.recv()
+                    except (EOFError, OSError):
+                        continue  # worker died; its sentinel triggers the restart below
+                    self._finish(readers[ready], job_id, ok, payload)
+            self._reap()
+
+    def _finish(self, worker: int, job_id: int, ok: bool, payload):
+        with self._lock:
+            entry = self._inflight[worker].pop(job_id, None)
+        if entry is None:
+            # Already failed by a restart — just free whatever it produced.
+            if ok:
+                _unpack(payload, unlink=True)
+            return
+        future, owned, _ = entry
+        _release(owned)
+        if not ok:
+            future.set_exception(InferenceError(payload))
+            return
+        try:
+            future.set_result(_unpack(payload, unlink=True))
+        except Exception as e:
+            future.set_exception(InferenceError(f"could not read worker result: {e}"))
+
+    def _reap(self):
+        """Restart any worker that has died or is sitting on an expired job."""
+        now = time.monotonic()
+        for i in range(len(self._procs)):
+            with self._lock:
+                proc = self._procs[i]
+                alive = proc.is_alive()
+                expired = any(deadline < now for _, _, deadline in self._inflight[i].values())
+                if (alive and not expired) or self._closed:
+                    continue
+                if alive:
+                    proc.kill()
+                proc.join(timeout=5)
+                reason = "timed out" if alive else f"exited with code {proc.exitcode}"
+                failed = self._inflight[i]
+                self._inflight[i] = {}
+                self._results[i].close()
+                self._start_worker(i)
+            print(f"⚠️ inference worker {i} {reason} — restarted, {len(failed)} job(s) failed")
+            for future, owned, _ in failed.values():
+                _release(owned)
+                future.set_exception(InferenceError(f"inference worker {reason}"))
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            for jobs in self._jobs:
+                jobs.put(None)
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.kill()
+        print("🛑 Inference pool stopped")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> InferencePool:
+    """Started on first use — same lazy pattern as the routers' own model loading."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = InferencePool(INFERENCE_WORKERS)
+            # Stop workers before multiprocessing's own exit hook terminates
+            # them, so the collector doesn't mistake that for a crash.
+            atexit.register(shutdown)
+        return _pool
+
+
+def run(module: str, fn: str, *args):
+    """Call module.fn(*args) in a worker process and block for the result.
+    Every failure — the job raised, its worker died or timed out — is an
+    InferenceError, which the routers report as a 503."""
+    try:
+        return get_pool().submit(module, fn, *args).result(timeout=INFERENCE_TIMEOUT + 30)
+    except FutureTimeoutError:
+        raise InferenceError("no result from the inference pool") from None
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
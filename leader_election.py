@@ -0,0 +1,123 @@
+"""
+Host-wide leader election for the background sync work in main.py (the
+DATA_DIR file watcher and the hourly GitHub poller).
+
+Every API process — each uvicorn/serve.py worker, or each container sharing
+a volume — runs a LeaderElection thread against the same lock file. Exactly
+one of them holds an exclusive flock() on it at a time and runs the
+background services; the rest are followers that retry every heartbeat. The
+kernel drops the lock the moment its holder dies (crash, OOM-kill, redeploy),
+so the next follower to tick takes over within one heartbeat interval —
+there's no lease expiry to tune and no stale owner to clean up.
+
+The leader also rewrites the file with its pid and a heartbeat timestamp on
+every tick, which is what status() reports, so /api/diag can show who is
+leading and whether it's still alive.
+
+On platforms without fcntl (Windows dev machines) every process is simply
+its own leader — the same single-process behaviour as before this existed.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+LEADER_LOCK_FILE = Path(os.getenv("LEADER_LOCK_FILE", "data/.background-leader.lock"))
+LEADER_HEARTBEAT_SECONDS = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "5"))
+
+
+class LeaderElection:
+    def __init__(
+        self,
+        on_elected: Callable[[], None],
+        on_tick: Optional[Callable[[bool], None]] = None,
+        path: Path = LEADER_LOCK_FILE,
+        interval: float = LEADER_HEARTBEAT_SECONDS,
+    ):
+        """on_elected runs once, on the election thread, when this process
+        becomes leader. on_tick(is_leader) runs every heartbeat on every
+        process — followers use it to pick up what the leader wrote to disk."""
+        self.path = path
+        self.interval = interval
+        self.on_elected = on_elected
+        self.on_tick = on_tick
+        self.is_leader = False
+        self._fd = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="leader-election", daemon=True)
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.interval + 1)
+        if self._fd is not None:
+            # Closing the descriptor releases the flock — a follower takes
+            # over on its next tick instead of waiting for this process to exit.
+            os.close(self._fd)
+            self._fd = None
+        self.is_leader = False
+
+    def _try_acquire(self) -> bool:
+        if fcntl is None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def _heartbeat(self):
+        if self._fd is None:
+            return
+        record = json.dumps({
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "heartbeat": time.time(),
+        }).encode("utf-8")
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, record, 0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self.is_leader and self._try_acquire():
+                    self.is_leader = True
+                    self._heartbeat()
+                    print(f"👑 Leader elected (pid {os.getpid()}) — starting background services")
+                    self.on_elected()
+                elif self.is_leader:
+                    self._heartbeat()
+                if self.on_tick:
+                    self.on_tick(self.is_leader)
+            except Exception as e:
+                print(f"⚠️ Leader election tick failed: {e}")
+            self._stop.wait(self.interval)
+
+    def status(self) -> dict:
+        """Who currently leads, per the lock file, and how fresh its heartbeat is."""
+        info = {"is_leader": self.is_leader, "pid": os.getpid()}
+        try:
+            record = json.loads(self.path.read_text(encoding="utf-8") or "{}")
+            info["leader_pid"] = record.get("pid")
+            info["leader_host"] = record.get("host")
+            if record.get("heartbeat"):
+                info["heartbeat_age_seconds"] = round(time.time() - record["heartbeat"], 1)
+        except (OSError, ValueError):
+            pass
+        return info
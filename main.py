@@ -28,6 +28,10 @@ from github import Github
 # Import from our engine
 from create_embeddings import process_single_file, process_single_repo, DATA_DIR, GITHUB_USERNAME, GITHUB_TOKEN
 
+# Optional out-of-process hosting for the heavy torch demos (INFERENCE_WORKERS)
+import inference_pool
+from leader_election import LeaderElection
+
 # ================= CONFIG =================
 load_dotenv()
 
@@ -354,9 +358,18 @@ class DataHandler(FileSystemEventHandler):
             print(f"👀 File created: {event.src_path}")
             process_single_file(Path(event.src_path))
 
+# File watcher + GitHub poller. On by default, and then run by whichever
+# process wins the host-wide leader election (leader_election.py), so N
+# workers/replicas don't each re-embed the same file, poll GitHub N times an
+# hour and race on projects_cache.json. BACKGROUND_SERVICES=0 takes a process
+# out of the election entirely.
+BACKGROUND_SERVICES = os.getenv("BACKGROUND_SERVICES", "1") != "0"
+leader_election: Optional[LeaderElection] = None
+
 # ================= PROJECTS CACHE =================
 # { "data": [...], "fetched_at": float }
 _projects_cache: Dict[str, Any] = {}
+_projects_cache_mtime: float = 0.0  # mtime of PROJECTS_FILE when last loaded/saved
 PROJECTS_CACHE_TTL = 3600  # 1 hour
 
 # Disk persistence: survives restarts. Manual sync writes here.
@@ -370,14 +383,24 @@ def _bust_projects_cache():
     print("🗑️  Projects cache cleared (in-memory)")
 
 
+def _projects_file_mtime() -> float:
+    try:
+        return PROJECTS_FILE.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
 def _load_projects_from_disk() -> Dict[str, Any]:
     """Load the persisted project cache from disk, if present."""
+    global _projects_cache_mtime
     if not PROJECTS_FILE.exists():
         return {}
     try:
+        mtime = _projects_file_mtime()
         with open(PROJECTS_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
         if isinstance(data, dict) and "data" in data:
+            _projects_cache_mtime = mtime
             print(f"💾 Loaded {len(data['data'])} projects from disk")
             return data
     except Exception as e:
@@ -386,16 +409,33 @@ def _load_projects_from_disk() -> Dict[str, Any]:
 
 
 def _save_projects_to_disk(payload: Dict[str, Any]) -> None:
-    """Persist the project cache to disk so it survives restarts."""
+    """Persist the project cache to disk so it survives restarts. Written to
+    a temp file and renamed into place, so another worker reading it
+    mid-write (or saving its own refresh at the same time) never sees a
+    half-written file."""
+    global _projects_cache_mtime
     try:
         PROJECTS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(PROJECTS_FILE, "w", encoding="utf-8") as f:
+        tmp = PROJECTS_FILE.with_name(f".{PROJECTS_FILE.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(payload, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, PROJECTS_FILE)
+        _projects_cache_mtime = _projects_file_mtime()
         print(f"💾 Saved {len(payload.get('data', []))} projects to {PROJECTS_FILE}")
     except Exception as e:
         print(f"⚠️ Failed to save projects to disk: {e}")
 
 
+def _reload_projects_if_changed() -> None:
+    """Pick up a projects_cache.json rewritten by another process (normally
+    the leader's hourly poll). One stat() when nothing changed."""
+    global _projects_cache
+    if _projects_file_mtime() > _projects_cache_mtime:
+        fresh = _load_projects_from_disk()
+        if fresh:
+            _projects_cache = fresh
+
+
 CATEGORY_PROMPT = """
 You are a senior portfolio curator for an AI engineer. Given a GitHub repo's
 metadata, write a polished project card. Be precise. Be specific. No fluff.
@@ -647,30 +687,46 @@ async def lifespan(app: FastAPI):
     except:
         print("⚠️ github_collection not found")
 
-    # 2. Start File Watcher
-    observer = Observer()
-    event_handler = DataHandler()
-    if DATA_DIR.exists():
-        observer.schedule(event_handler, str(DATA_DIR), recursive=False)
-        observer.start()
-        print(f"👀 Watching {DATA_DIR} for changes...")
-    
-    # 2.5 Load persisted projects cache from disk (survives restarts)
-    global _projects_cache
+    # 2. Load persisted projects cache from disk (survives restarts)
+    global _projects_cache, leader_election
     _projects_cache = _load_projects_from_disk()
 
-    # 3. Start GitHub Poller (every hour, incremental)
+    # 3. File watcher + GitHub poller (every hour, incremental) — started
+    # only in the elected leader; followers just re-read the projects cache
+    # whenever the leader rewrites it.
+    observer = Observer()
     scheduler = BackgroundScheduler()
-    scheduler.add_job(poll_github, 'interval', minutes=60)
-    scheduler.start()
-    print("⏰ GitHub poller started (60 min interval)")
+
+    def start_background_services():
+        if DATA_DIR.exists():
+            observer.schedule(DataHandler(), str(DATA_DIR), recursive=False)
+            observer.start()
+            print(f"👀 Watching {DATA_DIR} for changes...")
+        scheduler.add_job(poll_github, 'interval', minutes=60)
+        scheduler.start()
+        print("⏰ GitHub poller started (60 min interval)")
+
+    def follow_projects_cache(is_leader: bool):
+        if not is_leader:
+            _reload_projects_if_changed()
+
+    if BACKGROUND_SERVICES:
+        leader_election = LeaderElection(start_background_services, on_tick=follow_projects_cache)
+        leader_election.start()
+    else:
+        print("⏸️ Background services disabled in this worker (BACKGROUND_SERVICES=0)")
     
     yield
     
     # Shutdown
-    observer.stop()
-    observer.join()
-    scheduler.shutdown()
+    if leader_election is not None:
+        leader_election.stop()
+    if observer.is_alive():
+        observer.stop()
+        observer.join()
+    if scheduler.running:
+        scheduler.shutdown()
+    inference_pool.shutdown()
     print("🛑 Background services stopped")
 
 # ================= APP =================
@@ -1025,6 +1081,7 @@ async def diagnostic():
             "value": os.getenv("GITHUB_USERNAME"),
         },
         "module_OPENAI_API_KEY_loaded": bool(OPENAI_API_KEY),
+        "background_services": leader_election.status() if leader_election else {"enabled": False},
     }
 
 
@@ -1656,6 +1713,7 @@ async def get_projects(refresh: bool = False):
     """
     global _projects_cache
     now = time.time()
+    _reload_projects_if_changed()
 
     # Always serve from cache when available (in-memory or disk-loaded).
     # Refresh is now an explicit user action via /api/projects/refresh.
@@ -16,18 +16,29 @@ Unlike CLIP search, generation at request time is genuinely sequential —
 GPT-2 has no known answer to lean on for a brand-new image, so it produces
 one real word at a time, feeding its own previous output back in to predict
 the next, until it produces its own learned end-of-caption signal.
+
+It doesn't re-read everything it has written to do so, though: the 49
+image tokens go through GPT-2 once, and each later step feeds in only the
+newest token, attending to the keys/values GPT-2 cached for every earlier
+position (past_key_values). Re-running the whole sequence per step made a
+caption quadratic in its length; greedy output is identical either way
+(scripts/bench_mini_llava.py checks).
 """
 
 import io
 import json
 from pathlib import Path
 
+import numpy as np
 import torch
 import torch.nn as nn
 from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 from transformers import CLIPModel, CLIPProcessor, GPT2LMHeadModel, GPT2Tokenizer
 
+import inference_pool
+
 MODEL_DIR = Path(__file__).resolve().parent / "mini_llava_model_store"
 PROJECTOR_PATH = MODEL_DIR / "projector.pt"
 METRICS_PATH = MODEL_DIR / "metrics.json"
@@ -86,6 +97,15 @@ def _ensure_loaded():
         return
     LOAD_ATTEMPTED = True
 
+    if inference_pool.offloaded():
+        # CLIP + GPT-2 live in the inference workers instead — this process
+        # only needs to know whether they could load there.
+        try:
+            READY, metrics = inference_pool.run(__name__, "_worker_status")
+        except inference_pool.InferenceError as e:
+            print(f"mini_llava: inference worker failed to load models ({e}) — caption demo will report unavailable")
+        return
+
     if not PROJECTOR_PATH.exists():
         print("mini_llava: no trained projector found at mini_llava_model_store/projector.pt — demo disabled until it's added")
         return
@@ -109,6 +129,19 @@ def _ensure_loaded():
         print(f"mini_llava: failed to load models ({e}) — caption demo will report unavailable")
 
 
+def _worker_status():
+    _ensure_loaded()
+    return READY, metrics
+
+
+def _caption_pixels(pixels, max_new_tokens=25):
+    """Worker-side entry point: the RGB array arrives via shared memory."""
+    _ensure_loaded()
+    if not READY:
+        raise RuntimeError("Mini-LLaVA models not loaded in this worker")
+    return _generate_caption(Image.fromarray(pixels), max_new_tokens)
+
+
 def _get_patch_embeddings(pil_image):
     with torch.no_grad():
         inputs = clip_processor(images=[pil_image.convert("RGB")], return_tensors="pt")
@@ -117,23 +150,32 @@ def _get_patch_embeddings(pil_image):
 
 
 def _generate_caption(pil_image, max_new_tokens=25):
+    if inference_pool.offloaded():
+        pixels = np.asarray(pil_image.convert("RGB"))
+        return inference_pool.run(__name__, "_caption_pixels", pixels, max_new_tokens)
+
     with torch.no_grad():
         patches = _get_patch_embeddings(pil_image)
-        current_embeds = projector(patches)  # starts as just the 49 translated image pieces
-
-        generated_ids = []
-        for _ in range(max_new_tokens):
-            outputs = gpt2(inputs_embeds=current_embeds)
-            next_token_id = outputs.logits[0, -1, :].argmax().item()
-            if next_token_id == tokenizer.eos_token_id:
-                break
-            generated_ids.append(next_token_id)
-            next_embed = gpt2.transformer.wte(torch.tensor([[next_token_id]]))
-            current_embeds = torch.cat([current_embeds, next_embed], dim=1)
+        generated_ids = _decode(projector(patches), max_new_tokens)  # the 49 translated image pieces as prefix
 
     return tokenizer.decode(generated_ids, skip_special_tokens=True).strip()
 
 
+def _decode(prefix_embeds, max_new_tokens):
+    """Greedy token ids after prefix_embeds ([1, n, 768]), up to GPT-2's end-of-text."""
+    generated_ids = []
+    step_embeds, past = prefix_embeds, None
+    for _ in range(max_new_tokens):
+        outputs = gpt2(inputs_embeds=step_embeds, past_key_values=past, use_cache=True)
+        past = outputs.past_key_values
+        next_token_id = outputs.logits[0, -1, :].argmax().item()
+        if next_token_id == tokenizer.eos_token_id:
+            break
+        generated_ids.append(next_token_id)
+        step_embeds = gpt2.transformer.wte(torch.tensor([[next_token_id]]))
+    return generated_ids
+
+
 @router.get("/status")
 def get_status():
     _ensure_loaded()
@@ -150,7 +192,11 @@ def get_metrics():
 
 @router.post("/caption")
 async def caption_image(file: UploadFile = File(...)):
-    _ensure_loaded()
+    # Loading and generating both block — on GPT-2 in-process, or on the
+    # inference worker's reply when offloaded — so neither may run on the
+    # event loop, where it would stall every other request (chat streams
+    # included) for the length of a caption.
+    await run_in_threadpool(_ensure_loaded)
     if not READY:
         raise HTTPException(status_code=503, detail="Mini-LLaVA not ready (no trained projector loaded)")
     try:
@@ -160,7 +206,9 @@ async def caption_image(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Could not read uploaded image")
 
     try:
-        caption = _generate_caption(pil_image)
+        caption = await run_in_threadpool(_generate_caption, pil_image)
+    except inference_pool.InferenceError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Generation failed: {e}")
 
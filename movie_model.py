@@ -9,28 +9,146 @@ same core matrix factorization idea with scikit-learn's TruncatedSVD
 instead, and precomputes item-item similarity at training time rather than
 scoring live — recommendations are a lookup, not a runtime computation,
 which keeps this endpoint fast and dependency-light.
+
+The neighbour table ships as CSR arrays (scripts/export_movie_neighbors.py
+builds them from the notebook's similar_movies.json) that are memory-mapped
+rather than parsed, with rows in catalog order; a recommendation is one
+scatter-add over the picks' neighbour slices and an argpartition.
+
+That only ever reaches the picks' precomputed top-15s, so method="factors"
+(and /more-like-these, which pages through the same ranking) scores the
+whole catalog live instead: the picks' mean item-factor vector against
+every item in one matmul. Either candidate set can be re-ranked with MMR
+(diversity > 0) so the list isn't twelve sequels of the same film.
 """
 
 import json
-from collections import defaultdict
 from pathlib import Path
+from typing import Literal
 
+import numpy as np
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from title_index import TitleIndex
 
 MODEL_DIR = Path(__file__).resolve().parent / "movie_model_store"
 
 router = APIRouter(prefix="/api/movies", tags=["movies"])
 
 catalog: list[dict] = json.load(open(MODEL_DIR / "catalog.json"))
-similar_movies: dict = json.load(open(MODEL_DIR / "similar_movies.json"))
 metrics: dict = json.load(open(MODEL_DIR / "metrics.json"))
 
 catalog_by_id = {m["movieId"]: m for m in catalog}
+row_of = {m["movieId"]: r for r, m in enumerate(catalog)}
+
+# Row r's neighbours: neighbor_rows/neighbor_sims[neighbor_offsets[r]:neighbor_offsets[r + 1]].
+# np.asarray keeps the mmap'd pages but drops np.memmap's per-slice overhead.
+neighbor_offsets = np.asarray(np.load(MODEL_DIR / "neighbor_offsets.npy", mmap_mode="r"))
+neighbor_rows = np.asarray(np.load(MODEL_DIR / "neighbor_rows.npy", mmap_mode="r"))
+neighbor_sims = np.asarray(np.load(MODEL_DIR / "neighbor_sims.npy", mmap_mode="r"))
+if not np.array_equal(np.load(MODEL_DIR / "neighbor_movie_ids.npy"), list(row_of)):
+    raise RuntimeError("neighbor arrays are out of date with catalog.json; run scripts/export_movie_neighbors.py")
+
+# Unit-length latent vector per catalog row (scripts/export_movie_factors.py)
+item_factors = np.asarray(np.load(MODEL_DIR / "item_factors.npy", mmap_mode="r"))
+if len(item_factors) != len(catalog):
+    raise RuntimeError("item_factors.npy is out of date with catalog.json; run scripts/export_movie_factors.py")
+
+title_index = TitleIndex([m["title"] for m in catalog], [m["numRatings"] for m in catalog])
+
+RECOMMEND_TOP_K = 12
+MMR_MIN_POOL = 200  # MMR re-ranks this many (or 4x the page end) most relevant candidates
+MAX_MORE_LIKE = 500  # deepest position /more-like-these will page to
 
 
 class RecommendRequest(BaseModel):
     movie_ids: list[int]
+    method: Literal["neighbors", "factors"] = "neighbors"
+    diversity: float = Field(0.0, ge=0.0, le=1.0)
+
+
+class MoreLikeRequest(BaseModel):
+    movie_ids: list[int]
+    offset: int = Field(0, ge=0, lt=MAX_MORE_LIKE)
+    limit: int = Field(RECOMMEND_TOP_K, ge=1, le=50)
+    diversity: float = Field(0.0, ge=0.0, le=1.0)
+
+
+def pick_rows(movie_ids: list[int]) -> list[int]:
+    if not movie_ids:
+        raise HTTPException(status_code=400, detail="Pick at least one movie")
+    rows = []
+    for mid in movie_ids:
+        if mid not in row_of:
+            raise HTTPException(status_code=400, detail=f"Unknown movie id {mid}")
+        rows.append(row_of[mid])
+    return rows
+
+
+def neighbor_scores(rows: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """Candidates from the picks' neighbour lists and their mean similarity to the picks."""
+    # Aggregate similarity scores across all picked movies -- a candidate
+    # that's similar to multiple picks ranks higher than one only similar
+    # to a single pick.
+    spans = list(zip(neighbor_offsets[rows].tolist(), neighbor_offsets[np.add(rows, 1)].tolist()))
+    candidates = np.concatenate([neighbor_rows[lo:hi] for lo, hi in spans])
+    sims = np.concatenate([neighbor_sims[lo:hi] for lo, hi in spans])
+    scores = np.bincount(candidates, weights=sims, minlength=len(catalog))  # np.add.at, minus its overhead
+
+    touched = np.zeros(len(catalog), dtype=bool)
+    touched[candidates] = True
+    touched[rows] = False
+    candidates = np.flatnonzero(touched)
+    return candidates, scores[candidates] / len(rows)
+
+
+def factor_scores(rows: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """Every unpicked movie and its cosine similarity to the picks' mean factor vector."""
+    profile = item_factors[rows].mean(axis=0)
+    norm = np.linalg.norm(profile)
+    scores = item_factors @ (profile / norm) if norm > 0 else np.zeros(len(catalog), dtype=np.float32)
+    keep = np.ones(len(catalog), dtype=bool)
+    keep[rows] = False
+    candidates = np.flatnonzero(keep)
+    return candidates, scores[candidates]
+
+
+def top_ranked(candidates: np.ndarray, relevance: np.ndarray, k: int, diversity: float = 0.0):
+    """
+    The first k of candidates in ranked order, with their relevance. With
+    diversity > 0 the order is maximal marginal relevance: each next pick
+    maximizes (1 - diversity) * relevance - diversity * (its highest factor
+    cosine to anything already picked), over a pool of the most relevant.
+    """
+    k = min(k, len(candidates))
+    if k == 0:
+        return candidates[:0], relevance[:0]
+    pool = min(len(candidates), max(MMR_MIN_POOL, 4 * k)) if diversity > 0 else k
+    if pool < len(candidates):
+        best = np.argpartition(-relevance, pool - 1)[:pool]
+        candidates, relevance = candidates[best], relevance[best]
+    order = np.argsort(-relevance, kind="stable")
+    candidates, relevance = candidates[order], relevance[order]
+    if diversity == 0:
+        return candidates[:k], relevance[:k]
+
+    vectors = item_factors[candidates]
+    available = np.ones(len(candidates), dtype=bool)
+    redundancy = np.zeros(len(candidates), dtype=np.float32)
+    chosen = []
+    for step in range(k):
+        mmr = np.where(available, (1 - diversity) * relevance - diversity * redundancy, -np.inf)
+        i = int(np.argmax(mmr))
+        chosen.append(i)
+        available[i] = False
+        sims = vectors @ vectors[i]
+        redundancy = sims if step == 0 else np.maximum(redundancy, sims)
+    return candidates[chosen], relevance[chosen]
+
+
+def as_recommendations(rows: np.ndarray, scores: np.ndarray) -> list[dict]:
+    return [{**catalog[r], "matchScore": round(s, 3)} for r, s in zip(rows.tolist(), scores.tolist())]
 
 
 @router.get("/metrics")
@@ -40,39 +158,39 @@ def get_metrics():
 
 @router.get("/search")
 def search_movies(q: str = "", limit: int = 20):
-    """Simple title search for the picker UI's autocomplete."""
+    """
+    Title search for the picker UI's autocomplete, answered from the
+    load-time TitleIndex: prefix and word-prefix hits first, then infix and
+    typo-tolerant trigram matches, each ranked up by numRatings.
+    """
     if not q or len(q) < 2:
         # No query yet -- return the most-rated movies as good defaults to browse
         return catalog[:limit]
-    q_lower = q.lower()
-    matches = [m for m in catalog if q_lower in m["title"].lower()]
-    return matches[:limit]
+    return [catalog[i] for i in title_index.search(q, limit)]
 
 
 @router.post("/recommend")
 def recommend(payload: RecommendRequest):
-    if not payload.movie_ids:
-        raise HTTPException(status_code=400, detail="Pick at least one movie")
-
-    for mid in payload.movie_ids:
-        if str(mid) not in similar_movies:
-            raise HTTPException(status_code=400, detail=f"Unknown movie id {mid}")
-
-    # Aggregate similarity scores across all picked movies -- a candidate
-    # that's similar to multiple picks ranks higher than one only similar
-    # to a single pick.
-    scores = defaultdict(float)
-    for mid in payload.movie_ids:
-        for entry in similar_movies[str(mid)]:
-            if entry["movieId"] not in payload.movie_ids:
-                scores[entry["movieId"]] += entry["similarity"]
-
-    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:12]
-
-    results = []
-    for movie_id, score in ranked:
-        info = catalog_by_id.get(movie_id)
-        if info:
-            results.append({**info, "matchScore": round(score / len(payload.movie_ids), 3)})
-
-    return {"recommendations": results}
+    rows = pick_rows(payload.movie_ids)
+    scorer = factor_scores if payload.method == "factors" else neighbor_scores
+    top, scores = top_ranked(*scorer(rows), RECOMMEND_TOP_K, payload.diversity)
+    return {"recommendations": as_recommendations(top, scores)}
+
+
+@router.post("/more-like-these")
+def more_like_these(payload: MoreLikeRequest):
+    """
+    Page through the latent-factor ranking for a set of picks ("more like
+    these" / infinite scroll). The ranking is deterministic, so a page is
+    just a slice of the first offset + limit, computed fresh each call.
+    """
+    rows = pick_rows(payload.movie_ids)
+    end = min(payload.offset + payload.limit, MAX_MORE_LIKE)
+    top, scores = top_ranked(*factor_scores(rows), end, payload.diversity)
+    page = as_recommendations(top[payload.offset:], scores[payload.offset:])
+    more = len(top) == end and end < min(MAX_MORE_LIKE, len(catalog) - len(set(rows)))
+    return {
+        "recommendations": page,
+        "offset": payload.offset,
+        "nextOffset": end if more else None,
+    }
@@ -39,10 +39,13 @@ from openai import AsyncOpenAI, OpenAI
 from rank_bm25 import BM25Okapi
 from sentence_transformers import CrossEncoder, SentenceTransformer
 
+import inference_pool
+
 load_dotenv()
 
 CORPUS_PATH = Path(__file__).resolve().parent / "rag_model_store" / "rag_corpus.pkl"
 RERANK_LOW_CONFIDENCE_THRESHOLD = 0.0  # cross-encoder scores below this = probably not relevant
+CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 
 router = APIRouter(prefix="/api/rag", tags=["rag"])
 
@@ -85,7 +88,8 @@ def _ensure_loaded():
         chunk_embeddings = corpus["chunk_embeddings"]
 
         embed_model = SentenceTransformer("all-MiniLM-L6-v2")
-        cross_encoder = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+        if not inference_pool.offloaded():
+            cross_encoder = CrossEncoder(CROSS_ENCODER_MODEL)
         bm25 = BM25Okapi([c.lower().split() for c in chunks])
 
         api_key = os.getenv("OPENAI_API_KEY")
@@ -173,13 +177,25 @@ def _retrieve_hybrid(query, k=3, rrf_k=60):
     return top_idx, scores
 
 
+def _rerank_scores(pairs):
+    """Cross-encoder scores for (query, chunk) pairs — run in an inference
+    worker when INFERENCE_WORKERS is set, which loads its own copy of the
+    cross-encoder on first use."""
+    global cross_encoder
+    if inference_pool.offloaded():
+        return inference_pool.run(__name__, "_rerank_scores", pairs)
+    if cross_encoder is None:
+        cross_encoder = CrossEncoder(CROSS_ENCODER_MODEL)
+    return cross_encoder.predict(pairs)
+
+
 def _retrieve_reranked(query, wide_k=15, k=3):
     q_emb = embed_model.encode(query)
     emb_scores = np.array([_cosine_sim(q_emb, c) for c in chunk_embeddings])
     wide_idx = list(np.argsort(emb_scores)[::-1][:wide_k])
 
     pairs = [[query, chunks[i]] for i in wide_idx]
-    ce_scores = cross_encoder.predict(pairs)
+    ce_scores = _rerank_scores(pairs)
 
     reranked = sorted(zip(wide_idx, ce_scores), key=lambda x: x[1], reverse=True)[:k]
     top_idx = [i for i, _ in reranked]
@@ -355,9 +371,25 @@ async def stream_variant(variant: str, payload: dict):
     if len(query) > 300:
         raise HTTPException(status_code=400, detail="query too long (max 300 characters)")
 
+    # Run the generator up to its first event before answering, so a failed
+    # retrieval — the reranked cross-encoder's inference worker crashing or
+    # timing out — is a 503 rather than a 200 stream that just stops.
     generator = STREAM_GENERATORS[variant](query)
+    try:
+        first = await generator.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except inference_pool.InferenceError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def events():
+        if first is not None:
+            yield first
+        async for event in generator:
+            yield event
+
     return StreamingResponse(
-        generator,
+        events(),
         media_type="text/event-stream",
         headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -11,12 +11,24 @@ Live forecasts are precomputed at training time (this is a monthly
 forecast, not a per-row prediction — there's no "user input" to score
 against, so unlike the other three model routers, /predict just serves
 the already-computed future forecast and historical series).
+
+/forecast/live evaluates that same trend + seasonal model on the fly for
+any horizon, interval level and what-if scenario, with intervals from a
+residual bootstrap instead of the fixed normal band baked into
+future_forecast.json. At the default 80% level the bootstrap band is
+about 1.3k wider on each side (2019-01: 36,893–63,609 live vs
+38,173–62,271 stored). The stored band is ±1.28σ = ±12.0k, but the
+resampled residuals' 10th/90th percentiles sit at -13.3k/+13.4k, because
+the 48 in-sample residuals have more weight out there than a normal
+curve with their σ.
 """
 
 import json
+from functools import lru_cache
 from pathlib import Path
 
-from fastapi import APIRouter
+import numpy as np
+from fastapi import APIRouter, Query
 
 MODEL_DIR = Path(__file__).resolve().parent / "sales_model_store"
 
@@ -27,6 +39,22 @@ future_forecast: list[dict] = json.load(open(MODEL_DIR / "future_forecast.json")
 model_params: dict = json.load(open(MODEL_DIR / "model_params.json"))
 metrics: dict = json.load(open(MODEL_DIR / "metrics.json"))
 
+# ---------------------------------------------------------------------------
+# The fitted model as arrays: sales(t) = intercept + slope * t + seasonal[month]
+# with t = months since the first history month.
+# ---------------------------------------------------------------------------
+TREND_SLOPE = model_params["trend_slope"]
+TREND_INTERCEPT = model_params["trend_intercept"]
+SEASONAL = np.array([model_params["seasonal_index"][str(m)] for m in range(1, 13)])
+BOOTSTRAP_SAMPLES = 4000
+
+_history_sales = np.array([row["sales"] for row in full_history])
+_first_month = np.datetime64(full_history[0]["date"][:7], "M")
+_history_t = np.arange(len(full_history))
+_history_month = (_first_month + _history_t).astype(int) % 12  # 0 = January
+# In-sample residuals — what the bootstrap resamples to build intervals.
+residuals = _history_sales - (TREND_INTERCEPT + TREND_SLOPE * _history_t + SEASONAL[_history_month])
+
 
 @router.get("/metrics")
 def get_metrics():
@@ -41,3 +69,57 @@ def get_forecast():
         "forecast": future_forecast,
         "trend_dollars_per_month": model_params["trend_slope"],
     }
+
+
+@lru_cache(maxsize=256)
+def live_forecast(horizon: int, level: float, trend_multiplier: float, seasonal_amplitude: float) -> tuple:
+    """
+    Forecast `horizon` months past the end of the history, one NumPy pass.
+
+    Scenario knobs: trend_multiplier scales the slope from the last history
+    month onward (the trend line stays continuous), seasonal_amplitude
+    scales the monthly seasonal swings. Intervals come from adding
+    BOOTSTRAP_SAMPLES independent draws of the in-sample residuals to every
+    month at once and taking the central `level` quantiles. The RNG is
+    seeded, so a given parameter tuple always returns the same answer —
+    memoized here, and identical across workers.
+    """
+    last_t = len(full_history) - 1
+    t = last_t + np.arange(1, horizon + 1)
+    months = (_first_month + t).astype(int) % 12
+    trend = TREND_INTERCEPT + TREND_SLOPE * last_t + TREND_SLOPE * trend_multiplier * (t - last_t)
+    predicted = trend + seasonal_amplitude * SEASONAL[months]
+
+    rng = np.random.default_rng(0)
+    draws = rng.choice(residuals, size=(BOOTSTRAP_SAMPLES, horizon), replace=True)
+    tail = (1 - level) / 2
+    lower, upper = np.quantile(predicted + draws, [tail, 1 - tail], axis=0)
+
+    dates = (_first_month + t).astype(str)
+    return tuple(
+        {"date": f"{d}-01", "predicted": float(p), "lower": float(lo), "upper": float(hi)}
+        for d, p, lo, hi in zip(dates, predicted, lower, upper)
+    )
+
+
+@router.get("/forecast/live")
+def get_live_forecast(
+    horizon: int = Query(6, ge=1, le=60, description="Months to forecast"),
+    level: float = Query(0.8, ge=0.5, le=0.99, description="Prediction interval coverage"),
+    trend_multiplier: float = Query(1.0, ge=-2.0, le=5.0, description="Scales the monthly trend going forward"),
+    seasonal_amplitude: float = Query(1.0, ge=0.0, le=3.0, description="Scales the seasonal swings"),
+):
+    """Same shape as /forecast, computed live for the requested parameters."""
+    return {
+        "history": full_history,
+        "forecast": list(live_forecast(horizon, round(level, 4), round(trend_multiplier, 4), round(seasonal_amplitude, 4))),
+        "trend_dollars_per_month": TREND_SLOPE * trend_multiplier,
+        "params": {
+            "horizon": horizon,
+            "level": level,
+            "trend_multiplier": trend_multiplier,
+            "seasonal_amplitude": seasonal_amplitude,
+            "interval_method": "residual bootstrap",
+            "bootstrap_samples": BOOTSTRAP_SAMPLES,
+        },
+    }
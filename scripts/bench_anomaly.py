@@ -0,0 +1,109 @@
+"""
+Parity check + throughput benchmark for anomaly_model's batch scoring path
+(encode_frame + reconstruction_errors_scaled, behind /predict/batch).
+
+Synthetic NSL-KDD rows are built from the shipped examples' categorical
+values with randomized numeric columns. A sample is scored through the
+single-row path (_reconstruction_error) and must match the batch path;
+then the batch path is timed at a few chunk sizes, the whole endpoint end
+to end on a headerless KDDTest+-style CSV, and the live-feed StreamSession
+(/stream) at its default micro-batch size on records arriving one by one.
+
+Run from the repo root:   python scripts/bench_anomaly.py [--rows 100000]
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def synthetic_rows(anomaly_model, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    df = pd.DataFrame(0.0, index=range(n), columns=anomaly_model.NSL_KDD_COLUMNS[:-2])
+    for col in anomaly_model.CATEGORICAL_COLS:
+        df[col] = rng.choice(sorted({ex[col] for ex in anomaly_model.examples}), size=n)
+    for col in anomaly_model.NUMERIC_COLS:
+        if col.endswith("_rate"):
+            df[col] = rng.random(n).round(2)
+        elif col.endswith("_count") or col == "count":
+            df[col] = rng.integers(0, 256, n)
+        elif col in ("src_bytes", "dst_bytes", "duration"):
+            df[col] = rng.integers(0, 50_000, n)
+        else:
+            df[col] = rng.integers(0, 2, n)
+    df["label"] = np.where(rng.random(n) < 0.5, "normal", "neptune")
+    df["difficulty"] = 21
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    import anomaly_model
+
+    df = synthetic_rows(anomaly_model, args.rows, rng)
+
+    sample = df.head(200)
+    X, valid = anomaly_model.encode_frame(sample)
+    batch = anomaly_model.reconstruction_errors_scaled(X)
+    single = np.array([
+        anomaly_model._reconstruction_error(row)
+        for row in sample.drop(columns=["label", "difficulty"]).to_dict("records")
+    ])
+    diff = (np.abs(batch - single) / np.maximum(single, 1e-6)).max()
+    if not valid.all() or diff > 1e-5:
+        raise AssertionError(f"batch path differs from the single-row path (max relative Δ {diff:.2e})")
+    print(f"parity: max relative Δ reconstruction error {diff:.1e} over {len(sample)} rows")
+
+    start = time.perf_counter()
+    for row in sample.drop(columns=["label", "difficulty"]).to_dict("records"):
+        anomaly_model._reconstruction_error(row)
+    single_rate = len(sample) / (time.perf_counter() - start)
+    print(f"single-row path         {single_rate:10,.0f} rows/s")
+
+    for chunk_rows in (256, 1024, 4096):
+        start = time.perf_counter()
+        for lo in range(0, len(df), chunk_rows):
+            X, _ = anomaly_model.encode_frame(df.iloc[lo:lo + chunk_rows])
+            anomaly_model.reconstruction_errors_scaled(X)
+        rate = len(df) / (time.perf_counter() - start)
+        print(f"batch, {chunk_rows:>5} rows/chunk  {rate:10,.0f} rows/s   ({rate / single_rate:5.0f}x)")
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    app.include_router(anomaly_model.router)
+    csv = df.to_csv(index=False, header=False).encode()
+    start = time.perf_counter()
+    response = TestClient(app).post("/api/anomaly/predict/batch", files={"file": ("KDDTest+.txt", csv, "text/csv")})
+    elapsed = time.perf_counter() - start
+    summary = response.text.rstrip("\n").rsplit("\n", 1)[-1]
+    print(f"endpoint, {len(csv) / 1e6:.1f} MB CSV   {len(df) / elapsed:10,.0f} rows/s end to end")
+    print(f"   {summary}")
+
+    records = df.drop(columns=["label", "difficulty"]).to_dict("records")
+    session = anomaly_model.StreamSession()
+    start = time.perf_counter()
+    for record in records:
+        session.add(record)
+        if session.ready():
+            session.flush()
+    session.flush(final=True)
+    rate = len(records) / (time.perf_counter() - start)
+    print(f"stream, {anomaly_model.STREAM_BATCH_ROWS}-row micro-batches {rate:10,.0f} rows/s sustained")
+
+
+if __name__ == "__main__":
+    main()
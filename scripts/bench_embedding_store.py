@@ -0,0 +1,57 @@
+"""
+Recall + memory + latency benchmark for embedding_store.EmbeddingStore's
+float16 and int8 (per-vector scale) storage against float32, on the same
+synthetic clustered CLIP-like vectors as bench_ann.py.
+
+For each dtype: bytes held, worst absolute error in a query's scores,
+recall@k of its exact top-k against float32's, and per-query latency of a
+full blockwise scan.
+
+Run from the repo root:   python scripts/bench_embedding_store.py [--n 100000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_ann import clustered, recall, unit  # noqa: E402
+from embedding_store import STORE_DTYPES, EmbeddingStore  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    topics = unit(rng.normal(size=(200, 512)))
+    subjects = clustered(4000, rng, topics, noise=0.03)
+    vectors = torch.from_numpy(clustered(args.n, rng, subjects))
+    queries = torch.from_numpy(clustered(args.queries, rng, subjects))
+
+    reference = EmbeddingStore(vectors, "float32")
+    truth = [reference.topk(q, args.k)[1].tolist() for q in queries]
+    print(f"{args.n:,} x 512 vectors, {args.queries} queries")
+    for dtype in STORE_DTYPES:
+        store = EmbeddingStore(vectors, dtype)
+        err = max((store.scores(q) - reference.scores(q)).abs().max().item() for q in queries[:20])
+        start = time.perf_counter()
+        found = [store.topk(q, args.k)[1].tolist() for q in queries]
+        us = (time.perf_counter() - start) / len(queries) * 1e6
+        print(
+            f"   {dtype:<8} {store.nbytes / 1e6:7.1f} MB ({reference.nbytes / store.nbytes:3.1f}x smaller)   "
+            f"max |Δscore| {err:.1e}   recall@{args.k} {recall(found, truth):.4f}   {us:8,.0f} µs/query"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Parity check + microbenchmark for house_model's closed-form LinearEngine
+against the Lasso pipeline's own model.predict.
+
+Random valid HouseInput requests (every neighborhood, plus one unseen) are
+scored three ways — model.predict on the encoded row, engine.log_price per
+request and engine.log_price_batch over all of them — and must agree on the
+log price; then the single-request paths are timed.
+
+Run from the repo root:   python scripts/bench_house.py [--n 2000]
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_tabular import random_payload, timed  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    import house_model
+
+    neighborhoods = house_model.get_neighborhoods() + ["Nowhere"]
+    payloads = [
+        random_payload(house_model.HouseInput, rng, {"neighborhood": rng.choice(neighborhoods)})
+        for _ in range(args.n)
+    ]
+    reference = house_model.model.predict(np.vstack([house_model.preprocess(p) for p in payloads]))
+    single = np.array([house_model.engine.log_price(house_model.overrides(p)) for p in payloads])
+    batch = house_model.engine.log_price_batch([house_model.overrides(p) for p in payloads])
+    for name, got in (("log_price", single), ("log_price_batch", batch)):
+        diff = np.abs(got - reference).max()
+        if diff > 1e-9:
+            raise AssertionError(f"{name}: max |Δ log price| {diff:.2e} vs model.predict")
+        print(f"parity {name:<16} max |Δ log price| {diff:.1e}")
+
+    old_p50, old_p99 = timed(lambda p: house_model.model.predict(house_model.preprocess(p)), payloads)
+    new_p50, new_p99 = timed(lambda p: house_model.engine.log_price(house_model.overrides(p)), payloads)
+    print(f"model.predict      p50 {old_p50:7.1f} µs  p99 {old_p99:7.1f} µs")
+    print(f"engine.log_price   p50 {new_p50:7.1f} µs  p99 {new_p99:7.1f} µs   {old_p50 / new_p50:5.1f}x")
+    print("parity: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Parity + throughput benchmark for mini_llava_model._decode (KV-cached
+incremental decoding) against the old loop that re-ran GPT-2 over the 49
+image tokens plus everything generated so far at every step.
+
+Both decode greedily from the same projected prefixes; the script fails if
+any caption's token ids differ, and reports tokens/sec for each. With the
+trained projector in mini_llava_model_store/, prefixes come from real
+images (--images, or generated noise photos). --random-weights instead
+builds a freshly initialized GPT-2-small and random 49-token prefixes, so
+the speed comparison runs without the checkpoints — same architecture,
+same cost per token, captions meaningless.
+
+Run from the repo root:   python scripts/bench_mini_llava.py --images path/to/photos
+                          python scripts/bench_mini_llava.py --random-weights --tokens 25 100
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mini_llava_model as llava  # noqa: E402
+
+
+def uncached(prefix_embeds, max_new_tokens):
+    generated_ids = []
+    current_embeds = prefix_embeds
+    for _ in range(max_new_tokens):
+        outputs = llava.gpt2(inputs_embeds=current_embeds)
+        next_token_id = outputs.logits[0, -1, :].argmax().item()
+        if next_token_id == llava.tokenizer.eos_token_id:
+            break
+        generated_ids.append(next_token_id)
+        next_embed = llava.gpt2.transformer.wte(torch.tensor([[next_token_id]]))
+        current_embeds = torch.cat([current_embeds, next_embed], dim=1)
+    return generated_ids
+
+
+def prefixes(args, rng):
+    if args.random_weights:
+        from transformers import GPT2Config, GPT2LMHeadModel
+
+        config = GPT2Config()
+        torch.manual_seed(args.seed)
+        llava.gpt2 = GPT2LMHeadModel(config).eval()
+        llava.tokenizer = SimpleNamespace(eos_token_id=config.eos_token_id)
+        return [torch.randn(1, 49, config.n_embd, generator=torch.Generator().manual_seed(i)) for i in range(args.n)]
+
+    llava._ensure_loaded()
+    if not llava.READY:
+        sys.exit("Mini-LLaVA models not loaded — add the projector or pass --random-weights")
+    if args.images:
+        images = [Image.open(p) for p in sorted(args.images.iterdir())[: args.n]]
+    else:
+        images = [Image.fromarray(rng.integers(0, 255, (224, 224, 3), dtype=np.uint8)) for _ in range(args.n)]
+    with torch.no_grad():
+        return [llava.projector(llava._get_patch_embeddings(image)) for image in images]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=Path)
+    parser.add_argument("--n", type=int, default=8)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[25])
+    parser.add_argument("--random-weights", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    torch.set_grad_enabled(False)
+
+    embeds = prefixes(args, np.random.default_rng(args.seed))
+    print(f"{len(embeds)} prefixes of {embeds[0].shape[1]} image tokens")
+    for max_new_tokens in args.tokens:
+        rates = {}
+        outputs = {}
+        for name, decode in (("uncached", uncached), ("kv-cached", llava._decode)):
+            start = time.perf_counter()
+            outputs[name] = [decode(prefix, max_new_tokens) for prefix in embeds]
+            rates[name] = sum(map(len, outputs[name])) / (time.perf_counter() - start)
+        mismatched = sum(a != b for a, b in zip(outputs["uncached"], outputs["kv-cached"]))
+        print(
+            f"   max {max_new_tokens:4d} tokens   uncached {rates['uncached']:7.1f} tok/s   "
+            f"kv-cached {rates['kv-cached']:7.1f} tok/s   {rates['kv-cached'] / rates['uncached']:4.1f}x   "
+            f"identical captions {len(embeds) - mismatched}/{len(embeds)}"
+        )
+        if mismatched:
+            sys.exit("greedy captions differ between the two decoders")
+
+
+if __name__ == "__main__":
+    main()
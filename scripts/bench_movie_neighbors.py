@@ -0,0 +1,108 @@
+"""
+Parity check + load/memory/latency benchmark for movie_model's CSR
+neighbour arrays against the similar_movies.json dict they replaced.
+
+Random pick sets (1-8 movies, occasionally with a repeat) are recommended
+both ways — the old defaultdict loop over the parsed JSON, reproduced
+below, and the router's recommend() — and must return the same movies in
+the same order with the same matchScore (give or take one in the third
+decimal, where float32 similarities land a sum across a rounding edge).
+Load time and resident memory are measured in a fresh interpreter per
+format, then per-request latency.
+
+Run from the repo root:   python scripts/bench_movie_neighbors.py [--n 2000]
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_tabular import timed  # noqa: E402
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / "movie_model_store"
+
+LOADERS = {
+    "json": "import json; t = json.load(open(STORE / 'similar_movies.json'))",
+    "npy (mmap)": (
+        "import numpy as np; t = [np.load(STORE / f'neighbor_{name}.npy', mmap_mode='r') "
+        "for name in ('offsets', 'rows', 'sims')]; [a.sum() for a in t]"
+    ),
+}
+
+MEASURE = """
+import sys, time
+from pathlib import Path
+STORE = Path(sys.argv[1])
+def rss_kb():
+    return int(next(l for l in open('/proc/self/status') if l.startswith('VmRSS')).split()[1])
+import numpy  # imported by the router either way
+before, start = rss_kb(), time.perf_counter()
+{loader}
+print((time.perf_counter() - start) * 1000, rss_kb() - before)
+"""
+
+
+def json_recommend(similar_movies, catalog_by_id, movie_ids):
+    scores = defaultdict(float)
+    for mid in movie_ids:
+        for entry in similar_movies[str(mid)]:
+            if entry["movieId"] not in movie_ids:
+                scores[entry["movieId"]] += entry["similarity"]
+    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:12]
+    return [{**catalog_by_id[m], "matchScore": round(s / len(movie_ids), 3)} for m, s in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    for name, loader in LOADERS.items():
+        runs = [
+            subprocess.run(
+                [sys.executable, "-c", MEASURE.format(loader=loader), str(MODEL_DIR)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            for _ in range(5)
+        ]
+        load_ms = sorted(float(ms) for ms, _ in runs)[len(runs) // 2]
+        rss_mb = sorted(int(kb) for _, kb in runs)[len(runs) // 2] / 1024
+        print(f"load {name:<11} {load_ms:7.1f} ms   +{rss_mb:5.1f} MB RSS")
+
+    import movie_model
+
+    similar_movies = json.load(open(MODEL_DIR / "similar_movies.json"))
+    ids = [m["movieId"] for m in movie_model.catalog]
+    picks = []
+    for _ in range(args.n):
+        chosen = rng.sample(ids, rng.randint(1, 8))
+        if rng.random() < 0.05:
+            chosen.append(chosen[0])
+        picks.append(chosen)
+
+    for chosen in picks:
+        old = json_recommend(similar_movies, movie_model.catalog_by_id, chosen)
+        new = movie_model.recommend(movie_model.RecommendRequest(movie_ids=chosen))["recommendations"]
+        if [m["movieId"] for m in old] != [m["movieId"] for m in new] or any(
+            abs(a["matchScore"] - b["matchScore"]) > 1e-3 + 1e-9 for a, b in zip(old, new)
+        ):
+            raise AssertionError(f"recommendations differ for picks {chosen}")
+    print(f"parity: identical top-12 for {len(picks)} pick sets")
+
+    old_p50, old_p99 = timed(lambda c: json_recommend(similar_movies, movie_model.catalog_by_id, c), picks)
+    requests = [movie_model.RecommendRequest(movie_ids=c) for c in picks]
+    new_p50, new_p99 = timed(movie_model.recommend, requests)
+    print(f"json dict loop   p50 {old_p50:7.1f} µs  p99 {old_p99:7.1f} µs")
+    print(f"csr bincount     p50 {new_p50:7.1f} µs  p99 {new_p99:7.1f} µs   {old_p50 / new_p50:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Latency benchmark for movie_model's TitleIndex (title_index.py) against the
+old lowercase-and-substring-scan search, on the shipped catalog and on a
+synthetic one grown to full MovieLens size (~62k titles, built by
+recombining the real titles' words under random years and rating counts).
+
+Queries are what the picker actually sends: every prefix of sampled titles
+as it is typed (2 characters up), plus misspelled words. The substring scan
+is checked to be a subset of the index's hits for plain queries of four
+characters or more whose trigrams are all below the index's common-trigram
+cutoff (infixes shorter than that, or made only of stop trigrams like
+"and", are deliberately left to prefix matching), then both are timed per
+keystroke.
+
+Run from the repo root:   python scripts/bench_movie_search.py [--titles 62000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_tabular import timed  # noqa: E402
+from title_index import TitleIndex, normalize, trigrams  # noqa: E402
+
+
+def substring_scan(titles, q, limit=20):
+    q_lower = q.lower()
+    return [t for t in titles if q_lower in t.lower()][:limit]
+
+
+def synthetic_titles(titles, n, rng):
+    words = [w for t in titles for w in t.rsplit(" (", 1)[0].split()]
+    out = list(titles)
+    while len(out) < n:
+        out.append(f"{' '.join(rng.choices(words, k=rng.randint(1, 5)))} ({rng.randint(1900, 2023)})")
+    return out
+
+
+def queries(titles, rng, n=300):
+    typed, typos = [], []
+    for title in rng.sample(titles, n):
+        name = title.rsplit(" (", 1)[0]
+        typed.extend(name[:k] for k in range(2, min(len(name), 12) + 1))
+        word = max(name.split(), key=len)
+        if len(word) >= 5:
+            i = rng.randrange(1, len(word) - 1)
+            typos.append(word[:i] + word[i + 1:])
+    return typed, typos
+
+
+def bench(label, titles, popularity, rng):
+    start = time.perf_counter()
+    index = TitleIndex(titles, popularity)
+    build_ms = (time.perf_counter() - start) * 1000
+    typed, typos = queries(titles, rng)
+
+    for q in typed[:2000]:
+        plain = len(q) >= 4 and normalize(q) == q.lower().strip()
+        if not plain or any(len(index.postings.get(g, ())) > index.common for g in trigrams(normalize(q))):
+            continue
+        hits = {titles[i] for i in index.search(q, len(titles))}
+        missing = [t for t in substring_scan(titles, q, len(titles)) if t not in hits]
+        if missing:
+            raise AssertionError(f"{q!r}: substring match {missing[0]!r} not found by the index")
+
+    print(f"{label}: {len(titles):,} titles, index built in {build_ms:,.0f} ms")
+    for name, qs in (("as typed", typed), ("typos", typos)):
+        old_p50, old_p99 = timed(lambda q: substring_scan(titles, q), qs)
+        new_p50, new_p99 = timed(lambda q: index.search(q, 20), qs)
+        print(
+            f"   {name:<9} {len(qs):5d} queries   scan p50 {old_p50:8.1f} µs  p99 {old_p99:8.1f} µs   "
+            f"index p50 {new_p50:6.1f} µs  p99 {new_p99:6.1f} µs"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=62_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    import movie_model
+
+    titles = [m["title"] for m in movie_model.catalog]
+    popularity = [m["numRatings"] for m in movie_model.catalog]
+    bench("catalog", titles, popularity, rng)
+
+    big = synthetic_titles(titles, args.titles, rng)
+    bench("synthetic", big, popularity + [rng.randint(1, 50) for _ in range(len(big) - len(titles))], rng)
+
+
+if __name__ == "__main__":
+    main()
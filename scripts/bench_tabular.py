@@ -0,0 +1,225 @@
+"""
+Parity check + per-request microbenchmark for the tabular routers' shared
+FeatureEncoder (feature_encoder.py) against the one-row pandas
+DataFrame/reindex path each router used before it.
+
+For every router: random valid requests are encoded both ways, the encoded
+matrices and the final model outputs must match, then each preprocessing
+path is timed per request.
+
+Run from the repo root:   python scripts/bench_tabular.py [--n 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+import typing
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+warnings.filterwarnings("ignore", message="X has feature names")
+
+
+# ---------------------------------------------------------------------------
+# The pandas preprocessing each router used before FeatureEncoder
+# ---------------------------------------------------------------------------
+def churn_pandas(churn_model, payload, needs_scaling):
+    row = payload.model_dump()
+    encoded = {
+        "gender": 1 if row["gender"] == "Male" else 0,
+        "SeniorCitizen": row["SeniorCitizen"],
+        "tenure": row["tenure"],
+        "MonthlyCharges": row["MonthlyCharges"],
+        "TotalCharges": row["TotalCharges"],
+    }
+    for col in churn_model.BINARY_COLS:
+        encoded[col] = 1 if row[col] == "Yes" else 0
+    for col in churn_model.MULTI_CAT_COLS:
+        dummy_col = f"{col}_{row[col]}"
+        if dummy_col in churn_model.feature_names:
+            encoded[dummy_col] = 1
+    df = pd.DataFrame([encoded]).reindex(columns=churn_model.feature_names, fill_value=0)
+    return churn_model.scaler.transform(df) if needs_scaling else df
+
+
+def heart_pandas(heart_model, payload):
+    row = payload.model_dump(exclude={"model"})
+    encoded = {k: row[k] for k in (
+        "age", "sex", "resting_bp_s", "cholesterol", "fasting_blood_sugar",
+        "max_heart_rate", "exercise_angina", "oldpeak",
+    )}
+    for col in heart_model.CATEGORICAL_NOMINAL:
+        dummy_col = f"{col}_{float(row[col])}"
+        if dummy_col in heart_model.feature_names:
+            encoded[dummy_col] = 1
+    return pd.DataFrame([encoded]).reindex(columns=heart_model.feature_names, fill_value=0)
+
+
+def house_pandas(house_model, payload):
+    row = dict(house_model.default_profile)
+    row.update({
+        "Gr Liv Area": payload.gr_liv_area, "Overall Qual": payload.overall_qual,
+        "Overall Cond": payload.overall_cond, "Year Built": payload.year_built,
+        "Total Bsmt SF": payload.total_bsmt_sf, "Garage Cars": payload.garage_cars,
+        "Full Bath": payload.full_bath, "Bedroom AbvGr": payload.bedroom_abvgr,
+        "Lot Area": payload.lot_area, "Neighborhood": payload.neighborhood,
+        "Kitchen Qual": house_model.ORDINAL_MAPS["Kitchen Qual"][payload.kitchen_qual],
+        "Exter Qual": house_model.ORDINAL_MAPS["Exter Qual"][payload.exter_qual],
+    })
+    encoded = {}
+    for key, value in row.items():
+        if isinstance(value, str):
+            dummy_col = f"{key}_{value}"
+            if dummy_col in house_model.feature_names:
+                encoded[dummy_col] = 1
+        else:
+            encoded[key] = value
+    return pd.DataFrame([encoded]).reindex(columns=house_model.feature_names, fill_value=0)
+
+
+def anomaly_pandas(anomaly_model, row):
+    encoded = pd.get_dummies(pd.DataFrame([row]), columns=anomaly_model.CATEGORICAL_COLS)
+    encoded = encoded.reindex(columns=anomaly_model.feature_columns, fill_value=0)
+    return anomaly_model.scaler.transform(encoded)
+
+
+# ---------------------------------------------------------------------------
+# Random valid requests
+# ---------------------------------------------------------------------------
+def random_payload(model_cls, rng: random.Random, overrides=None):
+    values = {}
+    for name, field in model_cls.model_fields.items():
+        choices = typing.get_args(field.annotation) if typing.get_origin(field.annotation) is typing.Literal else None
+        if choices:
+            values[name] = rng.choice(choices)
+            continue
+        if field.annotation not in (int, float):
+            continue  # free-form fields (e.g. neighborhood) come from overrides/defaults
+        lo = next((m.ge for m in field.metadata if hasattr(m, "ge")), 0)
+        hi = next((m.le for m in field.metadata if hasattr(m, "le")), max(10 * (field.default or 1), 1))
+        if field.annotation is int:
+            values[name] = rng.randint(int(lo), int(hi))
+        elif field.annotation is float:
+            values[name] = round(rng.uniform(lo, hi), 2)
+    values.update(overrides or {})
+    return model_cls(**values)
+
+
+def timed(fn, inputs):
+    samples = []
+    for x in inputs:
+        start = time.perf_counter_ns()
+        fn(x)
+        samples.append(time.perf_counter_ns() - start)
+    samples = np.array(samples) / 1000.0
+    return np.median(samples), np.percentile(samples, 99)
+
+
+def report(name, pandas_fn, encoder_fn, inputs):
+    p50_old, p99_old = timed(pandas_fn, inputs)
+    p50_new, p99_new = timed(encoder_fn, inputs)
+    print(
+        f"{name:<10} pandas {p50_old:8.1f} µs (p99 {p99_old:8.1f})   "
+        f"encoder {p50_new:6.1f} µs (p99 {p99_new:6.1f})   {p50_old / p50_new:5.1f}x"
+    )
+
+
+def check(name, a, b):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    if a.shape != b.shape or not np.allclose(a, b, rtol=1e-9, atol=1e-12):
+        raise AssertionError(f"{name}: encoder output differs from the pandas path")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    import churn_model
+
+    payloads = [random_payload(churn_model.CustomerInput, rng) for _ in range(args.n)]
+    for config in churn_model.MODEL_REGISTRY.values():
+        scaled = config["needs_scaling"]
+        old = [churn_pandas(churn_model, p, scaled) for p in payloads]
+        new = [churn_model.preprocess(p, scaled) for p in payloads]
+        for a, b in zip(old, new):
+            check("churn encode", a, b)
+        stack = np.vstack if scaled else pd.concat
+        check(
+            f"churn predict ({config['label']})",
+            config["estimator"].predict_proba(stack(old)),
+            config["estimator"].predict_proba(np.vstack(new)),
+        )
+    report(
+        "churn",
+        lambda p: churn_pandas(churn_model, p, False),
+        lambda p: churn_model.preprocess(p, False),
+        payloads,
+    )
+
+    import heart_model
+
+    payloads = [random_payload(heart_model.PatientInput, rng) for _ in range(args.n)]
+    for p in payloads:
+        old, new = heart_pandas(heart_model, p), heart_model.preprocess(p)
+        check("heart encode", old, new)
+    check(
+        "heart predict",
+        heart_model.lr_pipeline.predict_proba(pd.concat([heart_pandas(heart_model, p) for p in payloads])),
+        heart_model.lr_pipeline.predict_proba(np.vstack([heart_model.preprocess(p) for p in payloads])),
+    )
+    report("heart", lambda p: heart_pandas(heart_model, p), heart_model.preprocess, payloads)
+
+    import house_model
+
+    neighborhoods = house_model.get_neighborhoods()
+    payloads = [
+        random_payload(house_model.HouseInput, rng, {"neighborhood": rng.choice(neighborhoods)})
+        for _ in range(args.n)
+    ]
+    for p in payloads:
+        check("house encode", house_pandas(house_model, p), house_model.preprocess(p))
+    check(
+        "house predict",
+        house_model.model.predict(pd.concat([house_pandas(house_model, p) for p in payloads])),
+        house_model.model.predict(np.vstack([house_model.preprocess(p) for p in payloads])),
+    )
+    report("house", lambda p: house_pandas(house_model, p), house_model.preprocess, payloads)
+
+    import anomaly_model
+
+    base_rows = [
+        {k: v for k, v in ex.items() if k not in ("index", "true_label", "predicted_label", "reconstruction_error", "correct")}
+        for ex in anomaly_model.examples
+    ]
+    rows = []
+    for _ in range(args.n):
+        row = dict(rng.choice(base_rows))
+        row["src_bytes"] = rng.randint(0, 100_000)
+        row["count"] = rng.randint(0, 500)
+        rows.append(row)
+    for row in rows:
+        check(
+            "anomaly encode",
+            anomaly_pandas(anomaly_model, row),
+            anomaly_model.scaler.transform(anomaly_model.encoder.encode(row)),
+        )
+    report(
+        "anomaly",
+        lambda r: anomaly_pandas(anomaly_model, r),
+        lambda r: anomaly_model.scaler.transform(anomaly_model.encoder.encode(r)),
+        rows,
+    )
+    print("parity: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Parity check + single-row microbenchmark for the XGBoost scoring engines in
+xgb_scoring.py (sklearn predict_proba vs Booster.inplace_predict vs the
+flattened NumPy TreeEnsemble), on the churn and fraud models.
+
+Rows are real requests: random valid churn payloads run through the router's
+own preprocess(), and fraud's held-out example transactions with small
+perturbations (plus a few NaNs to exercise default directions). Every engine
+must match sklearn's probabilities and make the same call at the model's
+threshold; then each is timed one row at a time, and on one batch.
+
+Run from the repo root:   python scripts/bench_xgb.py [--n 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_tabular import random_payload, timed  # noqa: E402
+from xgb_scoring import XGB_ENGINES, XGBScorer  # noqa: E402
+
+
+def check(name, ref, got, threshold):
+    diff = np.abs(ref - got).max()
+    flips = int(((ref >= threshold) != (got >= threshold)).sum())
+    if diff > 1e-5 or flips:
+        raise AssertionError(f"{name}: max |Δp| {diff:.2e}, {flips} decision flip(s) at the threshold")
+    return diff
+
+
+def bench(name, model, rows, threshold):
+    scorers = {engine: XGBScorer(model, engine=engine) for engine in XGB_ENGINES}
+    ref = model.predict_proba(rows)[:, 1]
+    for engine, scorer in scorers.items():
+        single = np.concatenate([scorer.positive_proba(rows[i:i + 1]) for i in range(len(rows))])
+        diff = max(check(f"{name}/{engine} single", ref, single, threshold),
+                   check(f"{name}/{engine} batch", ref, scorer.positive_proba(rows), threshold))
+        print(f"   parity {engine:<8} max |Δp| {diff:.1e}")
+
+    singles = [rows[i:i + 1] for i in range(len(rows))]
+    base_p99 = None
+    for engine in ("sklearn", "inplace", "numpy"):
+        scorer = scorers[engine]
+        p50, p99 = timed(scorer.positive_proba, singles)
+        base_p99 = base_p99 or p99
+        start = time.perf_counter()
+        scorer.positive_proba(rows)
+        batch_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"   {engine:<8} 1 row p50 {p50:7.1f} µs  p99 {p99:7.1f} µs  ({base_p99 / p99:4.1f}x p99)   "
+            f"{len(rows)} rows {batch_ms:7.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+
+    import churn_model
+
+    payloads = [random_payload(churn_model.CustomerInput, rng) for _ in range(args.n)]
+    rows = np.vstack([churn_model.preprocess(p, False) for p in payloads]).astype(np.float32)
+    print("churn")
+    bench("churn", churn_model.xgb_model, rows, churn_model.MODEL_REGISTRY["xgboost"]["threshold"])
+
+    import fraud_model
+
+    base = np.array(
+        [[e["features"][f] for f in fraud_model.feature_names] for e in fraud_model.examples], dtype=np.float32
+    )
+    rows = base[np_rng.integers(len(base), size=args.n)]
+    rows = rows + np_rng.normal(scale=0.05, size=rows.shape).astype(np.float32)
+    rows[np_rng.random(rows.shape) < 0.01] = np.nan
+    print("fraud")
+    bench("fraud", fraud_model.model, rows, fraud_model.THRESHOLD)
+    print("parity: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Build movie_model_store/item_factors.npy — float32 [n, FACTORS] unit-length
+latent vectors, one per catalog.json row — for movie_model's on-the-fly
+recommendations (profile vector x all items in one matmul).
+
+The training notebook's TruncatedSVD item factors were not exported, only
+the top-15 neighbour lists computed from them, and the ratings aren't in
+this repo. So the factors are recovered from the neighbour graph instead:
+the neighbour similarities (from the CSR arrays written by
+export_movie_neighbors.py) are symmetrized, degree-normalized and
+factored with the same TruncatedSVD. Items close in the graph, including
+two or more hops apart, end up close in the factor space. The script
+reports how much of each movie's original top-15 the factors' own top-15
+recovers. Re-export from the ratings matrix once that is available.
+
+Run from the repo root:   python scripts/export_movie_factors.py
+"""
+
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import TruncatedSVD
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / "movie_model_store"
+FACTORS = 64
+
+
+def main():
+    offsets = np.load(MODEL_DIR / "neighbor_offsets.npy")
+    rows = np.load(MODEL_DIR / "neighbor_rows.npy")
+    sims = np.load(MODEL_DIR / "neighbor_sims.npy")
+    n = len(offsets) - 1
+
+    graph = sp.csr_matrix((sims, (np.repeat(np.arange(n), np.diff(offsets)), rows)), shape=(n, n))
+    graph = graph.maximum(graph.T) + sp.identity(n)
+    scale = sp.diags(1 / np.sqrt(np.asarray(graph.sum(axis=1)).ravel()))
+    factors = TruncatedSVD(FACTORS, random_state=42).fit_transform(scale @ graph @ scale)
+    factors = (factors / np.linalg.norm(factors, axis=1, keepdims=True)).astype(np.float32)
+
+    cosine = factors @ factors.T
+    np.fill_diagonal(cosine, -np.inf)
+    top = np.argpartition(-cosine, 15, axis=1)[:, :15]
+    recall = np.mean([
+        len(set(top[r].tolist()) & set(rows[offsets[r]:offsets[r + 1]].tolist())) / (offsets[r + 1] - offsets[r])
+        for r in range(n)
+    ])
+
+    np.save(MODEL_DIR / "item_factors.npy", factors)
+    print(f"✅ Wrote {n} x {FACTORS} item factors to {MODEL_DIR} (recall of shipped top-15 neighbours: {recall:.2f})")
+
+
+if __name__ == "__main__":
+    main()
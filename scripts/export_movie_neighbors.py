@@ -0,0 +1,47 @@
+"""
+Convert movie_model_store/similar_movies.json (the training notebook's
+item-item neighbour export: {movieId: [{"movieId", "similarity"}, ...]})
+into the CSR arrays movie_model memory-maps at import:
+
+  neighbor_movie_ids.npy  int32 [n]      movieId of each row, in catalog.json order
+  neighbor_offsets.npy    int32 [n + 1]  row r's neighbours are [offsets[r], offsets[r + 1])
+  neighbor_rows.npy       int32 [nnz]    neighbour as a row index, best first
+  neighbor_sims.npy       float32 [nnz]  its similarity
+
+Rows follow the catalog so a row index is also a catalog position. Re-run
+after re-exporting the JSON:   python scripts/export_movie_neighbors.py
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / "movie_model_store"
+
+
+def main():
+    catalog = json.load(open(MODEL_DIR / "catalog.json"))
+    similar = json.load(open(MODEL_DIR / "similar_movies.json"))
+
+    movie_ids = np.array([m["movieId"] for m in catalog], dtype=np.int32)
+    row_of = {int(mid): r for r, mid in enumerate(movie_ids)}
+    lists = [similar.get(str(mid), []) for mid in movie_ids]
+
+    offsets = np.zeros(len(movie_ids) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(entries) for entries in lists])
+    rows = np.array([row_of[e["movieId"]] for entries in lists for e in entries], dtype=np.int32)
+    sims = np.array([e["similarity"] for entries in lists for e in entries], dtype=np.float32)
+
+    for name, array in (
+        ("neighbor_movie_ids", movie_ids),
+        ("neighbor_offsets", offsets),
+        ("neighbor_rows", rows),
+        ("neighbor_sims", sims),
+    ):
+        np.save(MODEL_DIR / f"{name}.npy", array)
+    print(f"✅ Wrote {len(movie_ids)} rows, {len(rows)} neighbours to {MODEL_DIR}")
+
+
+if __name__ == "__main__":
+    main()
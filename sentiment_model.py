@@ -25,6 +25,8 @@ import torch.nn as nn
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
+from example_cache import ExampleResults
+
 MODEL_DIR = Path(__file__).resolve().parent / "sentiment_model_store"
 device = torch.device("cpu")
 
@@ -84,6 +86,29 @@ def text_to_sequence(text: str, max_len: int = MAX_LEN) -> list[int]:
     return ids
 
 
+def _positive_probabilities(texts: list[str]) -> list[float]:
+    # Every sequence is padded/truncated to MAX_LEN, so a batch goes through
+    # the LSTM exactly as each row would alone.
+    tensor = torch.tensor([text_to_sequence(t) for t in texts], dtype=torch.long)
+    with torch.no_grad():
+        return torch.sigmoid(model(tensor)).tolist()
+
+
+def _score_examples() -> dict:
+    texts = [ex["text"].strip() for ex in examples]
+    return dict(zip(texts, _positive_probabilities(texts)))
+
+
+# The sample reviews' probabilities, keyed by their text and scored once in
+# one batch on first use — clicking a sample is a dict lookup (see
+# example_cache.py).
+example_probabilities = ExampleResults(
+    "sentiment",
+    [MODEL_DIR / name for name in ("best_sentiment_model.pt", "vocab.json", "config.json", "examples.json")],
+    _score_examples,
+)
+
+
 class PredictRequest(BaseModel):
     text: str
 
@@ -95,6 +120,7 @@ def get_metrics():
 
 @router.get("/examples")
 def get_examples():
+    example_probabilities.get()  # scores them now if the cache was cold, before the first click
     return examples
 
 
@@ -109,12 +135,9 @@ def predict(payload: PredictRequest):
     if word_count == 0:
         raise HTTPException(status_code=400, detail="No usable words found in that text")
 
-    sequence = text_to_sequence(text)
-    tensor = torch.tensor([sequence], dtype=torch.long)
-
-    with torch.no_grad():
-        output = model(tensor)
-        probability = torch.sigmoid(output).item()
+    probability = example_probabilities.get().get(text)
+    if probability is None:
+        probability = _positive_probabilities([text])[0]
 
     sentiment = "positive" if probability > 0.5 else "negative"
     confidence = probability if sentiment == "positive" else 1 - probability
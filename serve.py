@@ -0,0 +1,250 @@
+"""
+Pre-fork launcher — serves the same `main:app` as `uvicorn main:app`, but
+with N worker processes that share one copy of the model artifacts.
+
+Running `uvicorn --workers N` spawns N fresh interpreters, and every one of
+them unpickles its own churn/heart/house/fraud models, its own anomaly and
+sentiment torch weights and its own DDPM + GAN — N full copies of the same
+read-only bytes. Here the master process imports those routers once, then
+forks the workers, which inherit the already-loaded objects copy-on-write.
+
+Two things keep the pages actually shared after the fork:
+  * gc.freeze() moves everything loaded so far into the GC's permanent
+    generation, so the collector in each worker never walks (and writes the
+    refcount/GC header of) those objects, which would copy their pages.
+  * Nothing in the master runs inference, opens a Chroma/SQLite connection
+    or starts a thread before forking — `main` itself (Chroma client, the
+    OpenAI client, background services) is only imported in the workers.
+
+The file watcher and GitHub poller run in whichever worker wins the
+lock-file leader election (leader_election.py, wired up in main.py's
+lifespan); if that worker dies another takes over within a heartbeat. A
+worker that exits is re-forked into the same slot.
+
+Per-worker memory is reported from /proc/<pid>/smaps_rollup a few seconds
+after every worker has signalled it's ready (uvicorn started, main's
+lifespan done — each writes a byte to a pipe the master watches), and on
+SIGUSR1: USS (private pages — what that worker really costs), PSS (shared
+pages split evenly) and RSS (what `top` shows, counting every shared page
+in full).
+
+Usage:   python serve.py --workers 4 --port 8000
+Report:  kill -USR1 <master pid>
+"""
+
+import argparse
+import gc
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+# Routers whose artifacts are loaded at import time — the whole point of
+# preloading. The lazily-loaded ones (CLIP, Mini-LLaVA, GPT-2 LoRA, RAG)
+# hold nothing until first request, so there's nothing to share for them.
+PRELOAD_MODULES = [
+    "churn_model",
+    "heart_model",
+    "house_model",
+    "fraud_model",
+    "sales_model",
+    "movie_model",
+    "sentiment_model",
+    "anomaly_model",
+    "diffusion_gan_model",
+]
+
+
+def preload():
+    for name in PRELOAD_MODULES:
+        try:
+            __import__(name)
+            print(f"📦 Preloaded {name}")
+        except ImportError as e:
+            # Same optional-router tolerance as main.py's include_router block.
+            print(f"⚠️ {name} not preloaded: {e}")
+    gc.collect()
+    gc.freeze()
+    print(f"🧊 gc.freeze(): {gc.get_freeze_count()} objects moved to the permanent generation")
+
+
+def _smaps_rollup(pid: int) -> dict:
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        pass
+    return fields
+
+
+def memory_report(master_pid: int, workers: dict):
+    """Print RSS / PSS / USS (MiB) for the master and every live worker."""
+    print("📊 memory (MiB)      RSS      PSS      USS")
+    rows = [("master", master_pid)] + [(f"worker {i}", pid) for i, pid in sorted(workers.items())]
+    total_uss = 0
+    for label, pid in rows:
+        m = _smaps_rollup(pid)
+        if not m:
+            print(f"   {label:<12} (unavailable — needs Linux /proc/<pid>/smaps_rollup)")
+            continue
+        uss = m.get("Private_Clean", 0) + m.get("Private_Dirty", 0)
+        total_uss += uss
+        print(f"   {label:<12} {m.get('Rss', 0) / 1024:8.1f} {m.get('Pss', 0) / 1024:8.1f} {uss / 1024:8.1f}")
+    print(f"   total unique (USS, all processes): {total_uss / 1024:.1f} MiB")
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(index: int, sock: socket.socket, args, ready_fd: int):
+    # Runs in the forked child and never returns.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # SIGUSR1 asks the master for a memory report; a process-group
+    # `kill -USR1` must not take the workers down with it.
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    code = 0
+    try:
+        import uvicorn
+
+        class Server(uvicorn.Server):
+            async def startup(self, sockets=None):
+                await super().startup(sockets=sockets)
+                if not self.should_exit:
+                    os.write(ready_fd, b"r")
+                os.close(ready_fd)
+
+        config = uvicorn.Config("main:app", log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+        Server(config).run(sockets=[sock])
+    except BaseException as e:
+        print(f"❌ worker {index} crashed: {e}")
+        code = 1
+    finally:
+        sys.stdout.flush()
+        os._exit(code)
+
+
+def _fork_worker(index: int, sock: socket.socket, args, starting: dict) -> int:
+    """Fork worker `index`; the read end of its readiness pipe goes into
+    starting (fd -> index) until the worker writes to it or dies."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # The read ends of every worker's pipe (this one's and those still
+        # starting) belong to the master alone.
+        for fd in [read_fd, *starting]:
+            os.close(fd)
+        _run_worker(index, sock, args, write_fd)
+    os.close(write_fd)
+    starting[read_fd] = index
+    print(f"🍴 worker {index} forked (pid {pid})")
+    return pid
+
+
+def _poll_ready(starting: dict) -> list[int]:
+    """Indexes of workers that signalled ready since the last poll."""
+    if not starting:
+        return []
+    readable, _, _ = select.select(list(starting), [], [], 0)
+    ready = []
+    for fd in readable:
+        index = starting.pop(fd)
+        if os.read(fd, 1):
+            ready.append(index)  # empty read: it exited before finishing start-up
+        os.close(fd)
+    return ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork AskSaud API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    parser.add_argument(
+        "--report-after", type=float, default=5.0,
+        help="seconds after every worker is ready to print the per-worker memory report (negative disables)",
+    )
+    args = parser.parse_args()
+
+    preload()
+    sock = _bind(args.host, args.port)
+    print(f"🚀 Listening on {args.host}:{args.port} with {args.workers} worker(s)")
+
+    master_pid = os.getpid()
+    starting = {}
+    workers = {i: _fork_worker(i, sock, args, starting) for i in range(args.workers)}
+    ready = set()
+    stopping = False
+    report_requested = False
+
+    def _stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _request_report(_signum, _frame):
+        nonlocal report_requested
+        report_requested = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGUSR1, _request_report)
+
+    report_at = None
+    report_pending = args.report_after >= 0
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            index = next((i for i, p in workers.items() if p == pid), None)
+            if index is None:
+                continue
+            del workers[index]
+            if not stopping:
+                print(f"⚠️ worker {index} (pid {pid}) exited with status {status} — re-forking")
+                time.sleep(1)  # don't spin if a worker dies straight away
+                ready.discard(index)
+                workers[index] = _fork_worker(index, sock, args, starting)
+            continue
+
+        for index in _poll_ready(starting):
+            ready.add(index)
+            print(f"✅ worker {index} ready")
+        if report_pending and len(ready) == args.workers:
+            report_at = time.monotonic() + args.report_after
+            report_pending = False
+
+        if report_requested or (report_at is not None and time.monotonic() >= report_at):
+            memory_report(master_pid, workers)
+            report_requested = False
+            report_at = None
+        time.sleep(0.5)
+
+    for fd in starting:
+        os.close(fd)
+    sock.close()
+    print("🛑 All workers stopped")
+
+
+if __name__ == "__main__":
+    main()
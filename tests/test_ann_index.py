@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from ann_index import IVFPQIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(2000, 32)).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    index = IVFPQIndex(nlist=16, m=8)
+    index.train(x)
+    index.add(x)
+    return index, x
+
+
+@pytest.mark.parametrize("nprobe, clamped", [(0, 1), (-3, 1), (1, 1), (16, 16), (1000, 16)])
+def test_search_clamps_nprobe(index, nprobe, clamped):
+    index, x = index
+    scores, ids = index.search(x[0], 10, nprobe)
+    expected_scores, expected_ids = index.search(x[0], 10, clamped)
+    assert len(ids) > 0
+    np.testing.assert_array_equal(ids, expected_ids)
+    np.testing.assert_array_equal(scores, expected_scores)
+
+
+def test_search_all_lists_matches_every_vector(index):
+    index, x = index
+    _, ids = index.search(x[0], len(x), nprobe=1000)
+    assert sorted(ids.tolist()) == list(range(len(x)))
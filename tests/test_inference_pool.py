@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import inference_pool
+
+
+# Jobs for the pool — spawned workers import this module by name to run them.
+def echo(x):
+    return x
+
+
+def crash():
+    os._exit(3)
+
+
+def hang():
+    time.sleep(60)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(inference_pool, "INFERENCE_WORKERS", 1)
+    monkeypatch.setattr(inference_pool, "INFERENCE_TIMEOUT", 3.0)
+    monkeypatch.setattr(inference_pool, "ENABLED", True)
+    yield
+    inference_pool.shutdown()
+
+
+def test_crashed_job_raises_inference_error_and_worker_restarts(pool):
+    with pytest.raises(inference_pool.InferenceError, match="exited with code 3"):
+        inference_pool.run(__name__, "crash")
+    assert inference_pool.run(__name__, "echo", 7) == 7
+
+
+def test_timed_out_job_raises_inference_error_and_worker_restarts(pool):
+    with pytest.raises(inference_pool.InferenceError, match="timed out"):
+        inference_pool.run(__name__, "hang")
+    assert inference_pool.run(__name__, "echo", "ok") == "ok"
+
+
+@pytest.mark.parametrize("reason", ["inference worker exited with code 3", "inference worker timed out"])
+def test_offloaded_ddpm_failure_is_a_503(monkeypatch, reason):
+    diffusion_gan_model = pytest.importorskip("diffusion_gan_model")
+    if not diffusion_gan_model.READY:
+        pytest.skip("DDPM checkpoint not available")
+
+    def fail(*_):
+        raise inference_pool.InferenceError(reason)
+
+    monkeypatch.setattr(inference_pool, "ENABLED", True)
+    monkeypatch.setattr(inference_pool, "run", fail)
+    app = FastAPI()
+    app.include_router(diffusion_gan_model.router)
+    response = TestClient(app).post("/api/diffusion-gan/generate", json={"model": "ddpm", "count": 1})
+    assert response.status_code == 503
+    assert response.json()["detail"] == reason
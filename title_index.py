@@ -0,0 +1,141 @@
+"""
+Title search index for movie_model's autocomplete.
+
+The picker used to lowercase every catalog title and substring-scan the lot
+on every keystroke, returning hits in catalog order. TitleIndex is built
+once at load time instead and answers from two structures:
+
+  * a sorted array of word-start suffixes of every normalized title
+    ("shawshank redemption 1994", "redemption 1994", "1994", ...). A query
+    is a bisect into it, and every key in the matching range is a title
+    with a word starting with what was typed — the usual autocomplete case,
+    found in O(log n) plus the size of the hit range.
+  * a trigram inverted index (trigram -> ids of titles containing it) for
+    everything else: infix matches and typos. Counting shared trigrams over
+    the query's posting lists is one bincount; a title sharing enough of
+    them is a fuzzy match.
+
+Normalization folds accents ("Léon" -> "leon"), drops punctuation, and
+also indexes MovieLens's "Shawshank Redemption, The" under "the shawshank
+redemption", the way people type it.
+
+Hits are ranked by match quality (start of title > start of a word > fuzzy
+trigram overlap) scaled up by popularity, so "star" puts the most-rated
+Star Wars film first rather than whichever title comes first in the file.
+"""
+
+import bisect
+import re
+import unicodedata
+from typing import Optional
+
+import numpy as np
+
+TITLE_PREFIX_SCORE = 1.0
+WORD_PREFIX_SCORE = 0.8
+FUZZY_SCORE = 0.6  # times the fraction of the query's trigrams a title shares
+FUZZY_MIN_OVERLAP = 0.5
+# Trigrams in more of the catalog than this (" th", "the", "he ") say little
+# and cost a lot; fuzzy matching ignores them, as a text index ignores stop words.
+FUZZY_COMMON_FRACTION = 0.05
+FUZZY_COMMON_MIN_TITLES = 1000
+POPULARITY_WEIGHT = 0.5  # the most-rated title's match score is boosted by this much (x1.5)
+
+_TRAILING_ARTICLE = re.compile(r"^(.*), (the|a|an|les|la|le|il|el|der|die|das)( \(.*)?$", re.IGNORECASE)
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+
+def title_variants(title: str) -> list[str]:
+    """The normalized title, plus the article-first form for "X, The (year)"."""
+    variants = [normalize(title)]
+    match = _TRAILING_ARTICLE.match(title)
+    if match:
+        variants.append(normalize(f"{match.group(2)} {match.group(1)}{match.group(3) or ''}"))
+    return variants
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    def __init__(self, titles: list[str], popularity: Optional[list[float]] = None):
+        self.n = len(titles)
+        pop = np.log1p(np.asarray(popularity if popularity is not None else np.zeros(self.n), dtype=np.float64))
+        self.boost = 1.0 + POPULARITY_WEIGHT * (pop / pop.max() if pop.max() > 0 else pop)
+
+        entries = []  # (key, doc, starts_title)
+        grams: dict[str, set[int]] = {}
+        for doc, title in enumerate(titles):
+            for variant in title_variants(title):
+                words = variant.split(" ")
+                offset = 0
+                for i, word in enumerate(words):
+                    entries.append((variant[offset:], doc, i == 0))
+                    offset += len(word) + 1
+                for gram in trigrams(variant):
+                    grams.setdefault(gram, set()).add(doc)
+        entries.sort()
+        self.keys = [key for key, _, _ in entries]
+        self.key_doc = np.array([doc for _, doc, _ in entries], dtype=np.int32)
+        # Popularity is fixed at load time, so each key's final rank is too.
+        self.key_rank = self.boost[self.key_doc] * np.where(
+            np.array([starts for _, _, starts in entries], dtype=bool), TITLE_PREFIX_SCORE, WORD_PREFIX_SCORE
+        )
+        self.postings = {gram: np.fromiter(sorted(docs), dtype=np.int32) for gram, docs in grams.items()}
+        self.common = max(FUZZY_COMMON_MIN_TITLES, int(FUZZY_COMMON_FRACTION * self.n))
+
+    def search(self, query: str, limit: int = 20) -> list[int]:
+        """Doc ids (positions in the titles list) of the best `limit` matches."""
+        q = normalize(query)
+        if not q or limit <= 0:
+            return []
+        scores: dict[int, float] = {}
+
+        lo = bisect.bisect_left(self.keys, q)
+        hi = bisect.bisect_left(self.keys, q + "\x7f", lo)
+        if hi > lo:
+            docs = self.key_doc[lo:hi]
+            ranked = self.key_rank[lo:hi]
+            # A title can sit in the range more than once (several words
+            # starting with q), so over-fetch before de-duplicating, and
+            # only rank the whole range if that still came up short.
+            for take in (4 * limit, hi - lo):
+                top = np.argpartition(-ranked, take - 1)[:take] if take < hi - lo else np.arange(hi - lo)
+                for i in top[np.argsort(-ranked[top], kind="stable")].tolist():
+                    scores.setdefault(int(docs[i]), float(ranked[i]))
+                if len(scores) >= limit or take >= hi - lo:
+                    break
+
+        if len(scores) < limit:
+            for doc, score in self._fuzzy(q).items():
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+
+        return sorted(scores, key=scores.__getitem__, reverse=True)[:limit]
+
+    def _fuzzy(self, q: str) -> dict[int, float]:
+        """
+        Titles sharing at least FUZZY_MIN_OVERLAP of q's informative (not
+        common) trigrams, scored by that fraction. Any such title must appear
+        in one of the rarest (present - needed + 1) posting lists, so
+        candidates come from those alone; the stop-trigram cutoff keeps the
+        lists short enough that counting them all is one small bincount.
+        """
+        query_grams = [g for g in trigrams(q) if len(self.postings.get(g, ())) <= self.common]
+        needed = int(np.ceil(FUZZY_MIN_OVERLAP * len(query_grams)))
+        lists = sorted((self.postings[g] for g in query_grams if g in self.postings), key=len)
+        if not query_grams or len(lists) < needed:
+            return {}
+        candidates = np.unique(np.concatenate(lists[:len(lists) - needed + 1]))
+        counts = np.bincount(np.concatenate(lists), minlength=self.n)[candidates]
+        keep = counts >= needed
+        docs = candidates[keep]
+        fuzzy = FUZZY_SCORE * counts[keep] / len(query_grams) * self.boost[docs]
+        return dict(zip(docs.tolist(), fuzzy.tolist()))